@@ -0,0 +1,234 @@
+import re, time, hashlib, threading
+from collections import deque
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+##############################################################################
+# LLM BACKENDS
+# complete(prompt, max_tokens, on_chunk=None, on_headers=None)
+#   -> (text, finish_reason, usage)
+# prompt is a string (one user message) or a list of chat messages.
+# OpenAIBackend talks to api.openai.com or any OpenAI-compatible server
+# (base_url), StubBackend answers deterministically without a network.
+# Every backend keeps a window of recent latencies (time to first chunk when
+# streaming, full call otherwise) so hedged() knows when a call is slow.
+##############################################################################
+LATENCY_WINDOW = 200
+MIN_SAMPLES    = 20
+
+
+def _messages(prompt: str | list[dict]) -> list[dict]:
+    return prompt if isinstance(prompt, list) else [{"role": "user", "content": prompt}]
+
+
+class LLMBackend:
+    name = "backend"
+    model = ""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency = {False: deque(maxlen=LATENCY_WINDOW), True: deque(maxlen=LATENCY_WINDOW)}
+
+    def _complete(self, prompt: str, max_tokens: int, on_chunk, on_headers):
+        raise NotImplementedError
+
+    def complete(self, prompt: str, max_tokens: int, on_chunk=None, on_headers=None):
+        started = time.perf_counter()
+        first = []
+
+        def _chunk(piece: str):
+            if not first:
+                first.append(True)
+                self.observe(time.perf_counter() - started, stream=True)
+            on_chunk(piece)
+
+        out = self._complete(prompt, max_tokens, _chunk if on_chunk else None, on_headers)
+        if not on_chunk:
+            self.observe(time.perf_counter() - started)
+        return out
+
+    def observe(self, seconds: float, stream: bool = False):
+        with self._lock:
+            self._latency[stream].append(seconds)
+
+    def p95(self, stream: bool = False) -> float | None:
+        # None until enough calls have been seen to trust the tail
+        with self._lock:
+            window = sorted(self._latency[stream])
+        if len(window) < MIN_SAMPLES:
+            return None
+        return window[min(len(window) - 1, round(0.95 * (len(window) - 1)))]
+
+    def for_model(self, model: str | None) -> "LLMBackend":
+        return self
+
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self, client, model: str, temperature: float = 0.2):
+        super().__init__()
+        self.client, self.model, self.temperature = client, model, temperature
+        self._variants: dict[str, OpenAIBackend] = {}
+
+    def for_model(self, model: str | None) -> LLMBackend:
+        # same client and connection pool, different model
+        if not model or model == self.model:
+            return self
+        with self._lock:
+            if model not in self._variants:
+                self._variants[model] = type(self)(self.client, model, self.temperature)
+            return self._variants[model]
+
+    def _complete(self, prompt, max_tokens, on_chunk, on_headers):
+        args = {"model": self.model, "messages": _messages(prompt),
+                "temperature": self.temperature, "max_tokens": max_tokens}
+        if not on_chunk:
+            raw = self.client.chat.completions.with_raw_response.create(**args)
+            if on_headers:
+                on_headers(raw.headers)
+            response = raw.parse()
+            choice = response.choices[0]
+            return choice.message.content or "", choice.finish_reason, response.usage
+
+        stream = self.client.chat.completions.create(**args, stream=True,
+                                                     stream_options={"include_usage": True})
+        if on_headers:
+            on_headers(stream.response.headers)
+        parts, finish_reason, usage = [], None, None
+        try:
+            for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage
+                for choice in chunk.choices:
+                    if choice.delta.content:
+                        parts.append(choice.delta.content)
+                        on_chunk(choice.delta.content)
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
+        finally:
+            stream.close()
+        return "".join(parts), finish_reason, usage
+
+
+class StubBackend(LLMBackend):
+    # deterministic output derived from the prompt; for tests, demos and CI
+    name = "stub"
+
+    def __init__(self, model: str = "stub", words: int = 120, latency: float = 0.0):
+        super().__init__()
+        self.model, self.words, self.latency = model, words, latency
+
+    def for_model(self, model: str | None) -> LLMBackend:
+        return self if not model or model == self.model else StubBackend(model, self.words, self.latency)
+
+    def _complete(self, prompt, max_tokens, on_chunk, on_headers):
+        # a continuation (assistant turn in the messages) picks up where it stopped;
+        # a multi-block prompt (engine.group_prompt) gets one marked section per task
+        messages = _messages(prompt)
+        tasks = re.findall(r"^--- TASK (\w+) ---$", messages[0]["content"], re.M) or [None]
+        total = self.words * len(tasks)
+        done = sum(len(re.findall(r"\b[0-9a-f]{8}\b", m["content"])) for m in messages if m["role"] == "assistant")
+        n = min(total - done, max_tokens)
+        text = ""
+        for i in range(done, done + n):
+            task, j = divmod(i, self.words)
+            source = f"{tasks[task]}\0{messages[0]['content']}" if tasks[task] else messages[0]["content"]
+            seed = hashlib.sha256(f"{self.model}\0{source}".encode()).hexdigest()
+            piece = seed[j % 56:j % 56 + 8] if i == done and not done else " " + seed[j % 56:j % 56 + 8]
+            if tasks[task] and j == 0:
+                piece = f"=== BEGIN {tasks[task]} ===\n{piece.strip()}"
+            if tasks[task] and j == self.words - 1:
+                piece += f"\n=== END {tasks[task]} ===\n"
+            text += piece
+            if on_chunk:
+                on_chunk(piece)
+        time.sleep(self.latency)
+        size = sum(len(m["content"]) for m in messages) // 4
+        usage = SimpleNamespace(prompt_tokens=size, completion_tokens=n, total_tokens=size + n)
+        return text, "length" if done + n < total else "stop", usage
+
+
+##############################################################################
+# HEDGED REQUESTS
+# The primary call runs alone until it is slower than the primary's observed
+# p95; then the same request goes to the secondary and the first attempt to
+# answer wins.  When streaming, "answer" means the first chunk: only the
+# winning attempt reaches on_chunk and the other one is aborted on its next
+# chunk.  An attempt that fails before it answers leaves the field to the
+# other one; a stream that fails after its first chunk raises (its chunks are
+# already out, so the other attempt cannot take over).
+##############################################################################
+_hedge_pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="aiactpack-hedge")
+
+
+class _Lost(Exception):
+    pass
+
+
+def hedged(primary: LLMBackend, secondary: LLMBackend | None, prompt: str, max_tokens: int,
+           on_chunk=None, on_headers=None, on_hedge=None, on_hedge_skipped=None,
+           stats: dict | None = None):
+    # on_hedge() runs before the duplicate is sent (e.g. to reserve quota);
+    # on_hedge_skipped() undoes it if the primary answered in the meantime
+    threshold = primary.p95(stream=bool(on_chunk)) if secondary else None
+    if threshold is None:
+        return primary.complete(prompt, max_tokens, on_chunk, on_headers)
+
+    lock = threading.Lock()
+    winner: list[LLMBackend] = []
+    answered = threading.Event()            # primary's first chunk, result or error
+
+    def _claim(backend: LLMBackend) -> bool:
+        with lock:
+            if not winner:
+                winner.append(backend)
+            return winner[0] is backend
+
+    def _attempt(backend: LLMBackend):
+        def _chunk(piece: str):
+            if not _claim(backend):
+                raise _Lost()
+            answered.set()
+            on_chunk(piece)
+        try:
+            out = backend.complete(prompt, max_tokens, _chunk if on_chunk else None,
+                                   on_headers if backend is primary else None)
+        finally:
+            if backend is primary:
+                answered.set()
+        if not _claim(backend):
+            raise _Lost()
+        return out
+
+    futures = {_hedge_pool.submit(_attempt, primary): primary}
+    if not answered.wait(threshold):
+        if on_hedge:
+            on_hedge()
+        if answered.is_set():
+            if on_hedge_skipped:
+                on_hedge_skipped()
+        else:
+            if stats is not None:
+                stats["hedged"] = True
+            futures[_hedge_pool.submit(_attempt, secondary)] = secondary
+    errors = []
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            try:
+                out = fut.result()
+            except _Lost:
+                continue
+            except Exception as e:
+                with lock:
+                    streamed = bool(winner) and winner[0] is futures[fut]
+                if streamed:
+                    raise                       # chunks already delivered; the other one stays aborted
+                errors.append(e)
+                continue
+            if stats is not None:
+                stats["backend"] = futures[fut].name
+            return out
+    raise errors[0]
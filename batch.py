@@ -0,0 +1,200 @@
+import json, time, uuid, shutil, pathlib, zipfile, tempfile
+from concurrent.futures import ThreadPoolExecutor
+import engine
+import rules
+
+##############################################################################
+# OFFLINE BATCH MODE
+# Write every rendered prompt of a pack into one JSONL request file, submit
+# it through a batch backend, poll, map results back to block codes and
+# assemble the pack.  Blocks that fail in the batch (or a batch that times out
+# and is cancelled) fall back to engine.generate_block on a worker pool.  A
+# pack with rate-limit placeholders is never assembled.
+##############################################################################
+TERMINAL = {"completed", "failed", "expired", "cancelled"}
+# terminal states whose output file holds the requests that did finish
+WITH_RESULTS = {"completed", "expired", "cancelled"}
+
+
+class RateLimitedBlocks(RuntimeError):
+    def __init__(self, codes: list[str]):
+        super().__init__(f"rate-limited, pack not assembled: {', '.join(codes)}")
+        self.codes = codes
+
+
+def write_batch_file(prompts: dict[str, str], path: pathlib.Path) -> pathlib.Path:
+    # one chat-completions request per {code: rendered prompt}
+    path = pathlib.Path(path)
+    with path.open("w", encoding="utf-8") as fh:
+        for code, prompt in prompts.items():
+            fh.write(json.dumps({
+                "custom_id": code,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": engine.backend_for(code).model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": engine.TEMPERATURE,
+                    "max_tokens": engine.budgets.get(code),
+                },
+            }, ensure_ascii=False) + "\n")
+    return path
+
+
+def parse_result_line(line: dict) -> tuple[str, str | None, str | None]:
+    # -> (code, text, finish_reason); text is None when the request failed
+    code = line.get("custom_id")
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        return code, None, None
+    choice = response["body"]["choices"][0]
+    return code, choice["message"]["content"], choice.get("finish_reason")
+
+
+##############################################################################
+# BACKENDS  (submit(path) -> id, status(id) -> str, results(id) -> [dict],
+#            cancel(id))
+##############################################################################
+class OpenAIBatchBackend:
+    def __init__(self, client=None, completion_window: str = "24h"):
+        # file/batch calls are not metered by engine.limiter: keep the SDK's own retries
+        self.client = client or engine.client.with_options(max_retries=2)
+        self.completion_window = completion_window
+
+    def submit(self, path: pathlib.Path) -> str:
+        with open(path, "rb") as fh:
+            upload = self.client.files.create(file=fh, purpose="batch")
+        batch = self.client.batches.create(input_file_id=upload.id,
+                                           endpoint="/v1/chat/completions",
+                                           completion_window=self.completion_window)
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def cancel(self, batch_id: str):
+        self.client.batches.cancel(batch_id)
+
+    def results(self, batch_id: str) -> list[dict]:
+        batch = self.client.batches.retrieve(batch_id)
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = self.client.files.content(file_id).text
+                lines += [json.loads(l) for l in text.splitlines() if l.strip()]
+        return lines
+
+
+def echo_responder(body: dict) -> str:
+    return f"[offline batch] {body['messages'][-1]['content']}"
+
+
+class LocalBatchBackend:
+    # file-based stand-in: <root>/<batch_id>/{input,output}.jsonl, no network
+    def __init__(self, root: str | pathlib.Path | None = None, responder=echo_responder):
+        self.root = pathlib.Path(root or tempfile.mkdtemp(prefix="aiactpack_batch_"))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.responder = responder
+
+    def submit(self, path: pathlib.Path) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        (self.root / batch_id).mkdir()
+        shutil.copy2(path, self.root / batch_id / "input.jsonl")
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        if (self.root / batch_id / "cancelled").exists():
+            return "cancelled"
+        out = self.root / batch_id / "output.jsonl"
+        if not out.exists():
+            self._process(batch_id)
+        return "completed"
+
+    def cancel(self, batch_id: str):
+        (self.root / batch_id / "cancelled").touch()
+
+    def _process(self, batch_id: str):
+        src = self.root / batch_id / "input.jsonl"
+        tmp = self.root / batch_id / "output.jsonl.tmp"
+        with src.open(encoding="utf-8") as fin, tmp.open("w", encoding="utf-8") as fout:
+            for line in fin:
+                req = json.loads(line)
+                text = self.responder(req["body"])
+                fout.write(json.dumps({
+                    "id": f"req_{uuid.uuid4().hex[:12]}",
+                    "custom_id": req["custom_id"],
+                    "response": {"status_code": 200, "body": {"choices": [{
+                        "index": 0, "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": text}}]}},
+                    "error": None,
+                }, ensure_ascii=False) + "\n")
+        tmp.replace(self.root / batch_id / "output.jsonl")
+
+    def results(self, batch_id: str) -> list[dict]:
+        out = self.root / batch_id / "output.jsonl"
+        if not out.exists():
+            return []
+        return [json.loads(l) for l in out.read_text(encoding="utf-8").splitlines() if l.strip()]
+
+
+##############################################################################
+# RUN + ASSEMBLE
+##############################################################################
+def run_batch(codes: list[str], payload: dict, backend,
+              poll_interval: float = 30, timeout: float = 24 * 3600) -> dict[str, tuple[str, str]]:
+    # -> {code: (text, finish_reason)} in the order of `codes`
+    done: dict[str, tuple[str, str]] = {}
+    prompts = {}
+    for code in codes:
+        if rules.fast_path(code):
+            done[code] = (rules.render(code, payload), "stop")
+            continue
+        prompt = engine.render_prompt(code, payload)
+        cached = engine.block_cache.get(engine.block_key(code, prompt)) if engine.block_cache else None
+        if cached is not None:
+            done[code] = (cached, "stop")
+        else:
+            prompts[code] = prompt
+
+    if prompts:
+        workdir = pathlib.Path(tempfile.mkdtemp(prefix="aiactpack_batch_"))
+        try:
+            batch_id = backend.submit(write_batch_file(prompts, workdir / "requests.jsonl"))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        deadline = time.time() + timeout
+        status = backend.status(batch_id)
+        while status not in TERMINAL and time.time() < deadline:
+            time.sleep(poll_interval)
+            status = backend.status(batch_id)
+        if status not in TERMINAL:
+            # the fallback below answers every block; do not pay for them twice
+            backend.cancel(batch_id)
+
+        if status in WITH_RESULTS:
+            for line in backend.results(batch_id):
+                code, text, finish_reason = parse_result_line(line)
+                if code in prompts and text is not None:
+                    done[code] = (text, finish_reason)
+                    if engine.block_cache and finish_reason == "stop":
+                        engine.block_cache.put(engine.block_key(code, prompts[code]), code, text)
+        missing = [code for code in prompts if code not in done]
+        if missing:
+            with ThreadPoolExecutor(max_workers=engine._pool_size(missing, engine.MAX_CONCURRENCY)) as pool:
+                for out in pool.map(lambda code: engine.generate_block(code, payload, queued_at=time.time()),
+                                    missing):
+                    done[out["code"]] = (out["text"], out["finish_reason"])
+    return {code: done[code] for code in codes}
+
+
+def build_pack_batch(codes: list[str], payload: dict, backend, zip_path: pathlib.Path,
+                     **kwargs) -> pathlib.Path:
+    results = run_batch(codes, payload, backend, **kwargs)
+    limited = [code for code, (_, finish_reason) in results.items() if finish_reason == "rate_limit"]
+    if limited:
+        raise RateLimitedBlocks(limited)
+    zip_path = pathlib.Path(zip_path)
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for code, (text, _) in results.items():
+            zf.writestr(f"{code}.md", text)
+    return zip_path
@@ -0,0 +1,134 @@
+import os, sys, time, json, random, argparse, tempfile, statistics, pathlib
+
+##############################################################################
+# END-TO-END BENCHMARK  (no network: engine.backend -> local FakeOpenAI)
+#   python bench.py --latency 0.8 --rate-429 0.05 --runs 5 --output bench.json
+#   python bench.py --jitter 0.4 --hedge       (second fake server as hedge target)
+# Times build_block, the individual / bundle / complete flows, zip assembly
+# and PDF rendering; reports p50/p95/p99 and blocks-per-second as JSON.
+##############################################################################
+os.environ.setdefault("OPENAI_KEY", "bench")
+os.environ.setdefault("AIACTPACK_CACHE_DB", "")          # always measure real calls
+
+import openai
+import engine
+from backends import OpenAIBackend
+from fake_openai import FakeOpenAI
+from limiter import RateLimiter
+from pack import PackWriter
+
+PAYLOAD = {
+    "sector": "FinTech", "model_name": "CreditGPT-3", "n_users": 5000, "high_risk": "Credit scoring",
+    "data_modal": ["Text", "Tabular"], "deploy_env": "AWS", "ce_mark": "No", "target_mkt": ["EU"],
+    "sandbox": "No", "model_family": "GPT-4", "data_sources": "internal-2022-2024.csv",
+}
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))]
+
+
+def summarise(name: str, timings: list[float], blocks_per_run: int) -> dict:
+    return {
+        "scenario": name,
+        "runs": len(timings),
+        "blocks_per_run": blocks_per_run,
+        "mean_s": round(statistics.mean(timings), 4),
+        "p50_s": round(percentile(timings, 0.50), 4),
+        "p95_s": round(percentile(timings, 0.95), 4),
+        "p99_s": round(percentile(timings, 0.99), 4),
+        "blocks_per_s": round(blocks_per_run * len(timings) / sum(timings), 2) if blocks_per_run else None,
+    }
+
+
+def timed(fn, runs: int) -> list[float]:
+    out = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t0)
+    return out
+
+
+def run(args) -> dict:
+    fake = FakeOpenAI(latency=args.latency, jitter=args.jitter, completion_tokens=args.tokens,
+                      rate_429=args.rate_429, retry_after_ms=args.retry_after_ms, seed=args.seed).start()
+    engine.backend = OpenAIBackend(openai.OpenAI(api_key="bench", base_url=fake.base_url, max_retries=0),
+                                   engine.MODEL)
+    hedge = None
+    if args.hedge:
+        hedge = FakeOpenAI(latency=args.latency, jitter=args.jitter, completion_tokens=args.tokens,
+                           seed=args.seed + 1).start()
+        engine.hedge_backend = OpenAIBackend(openai.OpenAI(api_key="bench", base_url=hedge.base_url,
+                                                           max_retries=0), engine.MODEL)
+    engine.block_cache = None
+    engine.limiter = RateLimiter(rpm=args.rpm, tpm=args.tpm)
+    workdir = pathlib.Path(tempfile.mkdtemp(prefix="aiactpack_bench_"))
+    rng = random.Random(args.seed)
+    conc = args.concurrency
+    results = []
+    try:
+        results.append(summarise("build_block", timed(
+            lambda: engine.build_block("A00", PAYLOAD, out_dir=workdir), args.runs), 1))
+        individual = rng.sample(engine.BUNDLES["complete"], 3)
+        results.append(summarise("individual_3", timed(
+            lambda: engine.build_blocks(individual, PAYLOAD, conc, out_dir=workdir), args.runs), 3))
+        for name in ("eu", "nist", "iso"):
+            codes = engine.BUNDLES[name]
+            results.append(summarise(f"bundle_{name}", timed(
+                lambda: engine.build_blocks(codes, PAYLOAD, conc, out_dir=workdir), args.runs), len(codes)))
+        codes = engine.BUNDLES["complete"]
+        results.append(summarise("complete", timed(
+            lambda: engine.build_blocks(codes, PAYLOAD, conc, out_dir=workdir), args.runs), len(codes)))
+
+        texts = {code: " ".join(f"w{i}" for i in range(args.tokens)) for code in codes}
+
+        def _zip():
+            with PackWriter(workdir / "bench.zip") as pack:
+                for code, text in texts.items():
+                    pack.add_block(code, text)
+                pack.add_file("report.pdf", os.urandom(64 * 1024))
+        results.append(summarise("zip_assembly", timed(_zip, args.runs), len(codes)))
+
+        try:
+            from report import render_report, report_context
+            ctx = report_context(PAYLOAD, codes)
+            render_report(ctx)                       # warm the cached resources
+            results.append(summarise("pdf_render", timed(lambda: render_report(ctx), args.runs), 0))
+        except (ImportError, OSError) as e:
+            results.append({"scenario": "pdf_render", "skipped": str(e)})
+    finally:
+        fake.stop()
+        if hedge:
+            hedge.stop()
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "config": vars(args),
+        "server": fake.stats,
+        "hedge_server": hedge.stats if hedge else None,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="AI Act Pack end-to-end benchmark")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--concurrency", type=int, default=engine.MAX_CONCURRENCY)
+    ap.add_argument("--latency", type=float, default=0.5, help="mean completion latency (s)")
+    ap.add_argument("--jitter", type=float, default=0.1, help="latency std-dev (s)")
+    ap.add_argument("--tokens", type=int, default=300, help="completion tokens per block")
+    ap.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered 429")
+    ap.add_argument("--retry-after-ms", type=int, default=200)
+    ap.add_argument("--rpm", type=int, default=100_000)
+    ap.add_argument("--tpm", type=int, default=100_000_000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--hedge", action="store_true", help="hedge slow calls to a second fake server")
+    ap.add_argument("--output", help="also write the JSON report to this file")
+    args = ap.parse_args()
+    report = json.dumps(run(args), indent=2)
+    print(report)
+    if args.output:
+        pathlib.Path(args.output).write_text(report, encoding="utf-8")
@@ -0,0 +1,146 @@
+import os, sys, json, time, shutil, pathlib, argparse, functools, contextlib, dataclasses, statistics, subprocess, tempfile, zipfile
+
+##############################################################################
+# STREAMLIT RERUN BENCHMARK  (streamlit.testing AppTest, no browser)
+#   python bench_app.py --runs 10 [--app path/to/home.py]
+# cold_start_s: first script run in a fresh interpreter (imports included)
+# per interaction, the same widget event timed two ways:
+#   full_s:     the whole script reruns (every interaction before fragments)
+#   fragment_s: only the st.fragment that owns the widget reruns, as in a
+#               browser session; None when the app has no such fragment
+# AppTest itself always reruns the whole script, so fragment runs are
+# requested through the RerunData a browser would send (fragment_id_queue).
+# Both are private Streamlit internals: when a release drops them, fragment_s
+# is None and fragment_unavailable says why.
+##############################################################################
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "home.py")
+TMP_DIRS: list[str] = []        # removed on exit
+
+
+def _tmpdir(prefix: str) -> str:
+    path = tempfile.mkdtemp(prefix=prefix)
+    TMP_DIRS.append(path)
+    return path
+
+
+def _button(at, prefix: str):
+    return next(b for b in at.button if b.label.startswith(prefix))
+
+
+def _lead_score(at):
+    next(t for t in at.text_input if t.label == "Business email").input("alice@example.com")
+    _button(at, "Get my score").click()
+
+
+def _fake_pack(at):
+    # a finished pack in session state makes the download/checkout area render
+    path = pathlib.Path(_tmpdir("aiactpack_benchapp_zip_")) / "Complete_Bundle.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("A00.md", "bench")
+    at.session_state.zips = [path]
+    at.session_state.cart = ["A00"]
+
+
+# name -> (fragment function, prepare(at), act(at))
+INTERACTIONS = {
+    "lead_score":     ("_lead_magnet", None, _lead_score),
+    # mandatory fields left empty: validation error, no job is queued
+    "wizard_submit":  ("_wizard", None, lambda at: _button(at, "Generate").click()),
+    "checkout_click": ("_download", _fake_pack, lambda at: _button(at, "Create crypto").click()),
+}
+
+
+def _env() -> dict:
+    tmp = _tmpdir("aiactpack_benchapp_")
+    return dict(os.environ, OPENAI_KEY=os.getenv("OPENAI_KEY", "bench"),
+                AIACTPACK_CACHE_DB="", AIACTPACK_JOBS_DB=os.path.join(tmp, "jobs.sqlite"),
+                AIACTPACK_PACKS_DIR=os.path.join(tmp, "packs"))
+
+
+def _cold_start(app: str) -> float:
+    # measured in a child so module imports are not already cached
+    code = ("import time, os; os.chdir(%r); t=time.perf_counter();"
+            "from streamlit.testing.v1 import AppTest;"
+            "AppTest.from_file(%r, default_timeout=60).run();"
+            "print(time.perf_counter()-t)") % (os.path.dirname(APP), app)
+    out = subprocess.run([sys.executable, "-c", code], env=_env(), capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _fragment_unavailable(at) -> str | None:
+    # reason fragment reruns cannot be requested with this Streamlit, or None
+    from streamlit.testing.v1 import local_script_runner
+    if not isinstance(getattr(getattr(at, "_fragment_storage", None), "_fragments", None), dict):
+        return "AppTest._fragment_storage._fragments not found"
+    rerun_data = getattr(local_script_runner, "RerunData", None)
+    if not (dataclasses.is_dataclass(rerun_data)
+            and "fragment_id_queue" in {f.name for f in dataclasses.fields(rerun_data)}):
+        return "local_script_runner.RerunData has no fragment_id_queue"
+    return None
+
+
+def _fragment_id(at, name: str) -> str | None:
+    for fid, fragment in at._fragment_storage._fragments.items():
+        for cell in fragment.__closure__ or ():
+            try:
+                if getattr(cell.cell_contents, "__name__", None) == name:
+                    return fid
+            except ValueError:
+                pass
+    return None
+
+
+@contextlib.contextmanager
+def _fragment_scope(fid: str):
+    # the next run only executes this fragment, like a widget event in a browser
+    from streamlit.testing.v1 import local_script_runner
+    rerun_data = local_script_runner.RerunData
+    local_script_runner.RerunData = functools.partial(rerun_data, fragment_id_queue=[fid])
+    try:
+        yield
+    finally:
+        local_script_runner.RerunData = rerun_data
+
+
+def _interaction(app: str, name: str, runs: int) -> dict:
+    from streamlit.testing.v1 import AppTest
+    fragment, prepare, act = INTERACTIONS[name]
+    at = AppTest.from_file(app, default_timeout=60)
+    if prepare:
+        prepare(at)
+    at.run()
+    timings = {"full": [], "fragment": []}
+    unavailable = _fragment_unavailable(at)
+    fid = None if unavailable else _fragment_id(at, fragment)
+    for _ in range(runs):
+        for mode in ("full", "fragment") if fid else ("full",):
+            act(at)
+            t0 = time.perf_counter()
+            with _fragment_scope(fid) if mode == "fragment" else contextlib.nullcontext():
+                at.run()
+            timings[mode].append(time.perf_counter() - t0)
+            if at.exception:
+                raise RuntimeError(f"{name}: {at.exception[0].value}")
+    out = {f"{mode}_{stat}_s": round(fn(values), 4) if values else None
+           for mode, values in timings.items()
+           for stat, fn in (("p50", statistics.median), ("max", max))}
+    if unavailable:
+        out["fragment_unavailable"] = unavailable
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Measure home.py cold start and per-interaction rerun latency")
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--app", default=APP, help="script to measure (e.g. an older home.py next to this one)")
+    args = ap.parse_args()
+    app = os.path.abspath(args.app)
+    try:
+        cold = [_cold_start(app) for _ in range(3)]
+        os.environ.update(_env())
+        os.chdir(os.path.dirname(APP))
+        print(json.dumps({"cold_start_s": round(statistics.median(cold), 4),
+                          **{name: _interaction(app, name, args.runs) for name in INTERACTIONS}}, indent=2))
+    finally:
+        for path in TMP_DIRS:
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,60 @@
+import os, json, math, pathlib, threading
+from collections import defaultdict, deque
+
+##############################################################################
+# ADAPTIVE TOKEN BUDGETS
+# max_tokens per prompt code, learned from the completion tokens of finished
+# blocks (continuations included): p95 of the recent window plus headroom,
+# clamped to [MIN_BUDGET, MAX_BUDGET].  Codes with too few samples get the
+# default.  A smaller budget is a smaller limiter reservation, so short
+# tables leave TPM quota for other calls; blocks that outgrow their budget
+# are continued by engine.complete and raise it for the next pack.
+##############################################################################
+MIN_BUDGET  = 128
+MAX_BUDGET  = int(os.getenv("AIACTPACK_MAX_BUDGET", "2048"))
+HEADROOM    = 1.15
+MIN_SAMPLES = 5
+WINDOW      = 50
+SAVE_EVERY  = 20
+
+
+class TokenBudgets:
+    def __init__(self, default: int, path: str | pathlib.Path | None = None):
+        self.default = default
+        self.path = pathlib.Path(path) if path else None
+        self._lock = threading.Lock()
+        self._seen: dict[str, deque] = defaultdict(lambda: deque(maxlen=WINDOW))
+        self._unsaved = 0
+        if self.path and self.path.exists():
+            for code, values in json.loads(self.path.read_text()).items():
+                self._seen[code].extend(values)
+
+    def get(self, code: str, default: int | None = None) -> int:
+        with self._lock:
+            seen = sorted(self._seen.get(code, ()))
+        if len(seen) < MIN_SAMPLES:
+            return default or self.default
+        p95 = seen[min(len(seen) - 1, round(0.95 * (len(seen) - 1)))]
+        return max(MIN_BUDGET, min(MAX_BUDGET, math.ceil(p95 * HEADROOM)))
+
+    def record(self, code: str, completion_tokens: int):
+        with self._lock:
+            self._seen[code].append(completion_tokens)
+            self._unsaved += 1
+            save = self.path and self._unsaved >= SAVE_EVERY
+        if save:
+            self.save()
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            codes = list(self._seen)
+        return {code: self.get(code) for code in sorted(codes)}
+
+    def save(self):
+        with self._lock:
+            data = json.dumps({code: list(v) for code, v in self._seen.items()})
+            self._unsaved = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(data)
+        os.replace(tmp, self.path)
@@ -0,0 +1,174 @@
+import re, csv, sys, json, time, argparse, pathlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import engine
+from catalog import PAYLOAD_FIELDS, REQUIRED_FIELDS, BUNDLES
+from metrics import metrics
+from pack import PackWriter
+
+##############################################################################
+# HEADLESS BULK GENERATION
+#   python bulk.py systems.csv --bundle eu --out packs/ --pdf
+# One wizard payload per CSV row / JSONL line.  Every block of every system
+# goes through one worker pool (and engine's shared limiter), so the whole
+# portfolio runs under a single concurrency and rate budget.  Each system
+# gets <out>/<system_id>.zip, written atomically when its last block is in;
+# a rerun skips systems whose ZIP already exists, and finished blocks of an
+# interrupted system come back from the block cache.
+##############################################################################
+LIST_FIELDS = ("data_modal", "target_mkt")
+INT_FIELDS  = ("n_users",)
+
+
+def _system_id(row: dict, seen: set[str]) -> str:
+    base = str(row.get("system_id") or row.get("id") or row.get("model_name") or "system")
+    base = re.sub(r"[^A-Za-z0-9_.-]+", "_", base).strip("_") or "system"
+    sid, n = base, 1
+    while sid in seen:
+        n += 1
+        sid = f"{base}_{n}"
+    seen.add(sid)
+    return sid
+
+
+def _payload(row: dict) -> dict:
+    # same rule as the wizard: only REQUIRED_FIELDS must be filled in
+    missing = [f for f in REQUIRED_FIELDS if row.get(f) in (None, "")]
+    if missing:
+        raise ValueError(f"missing wizard fields: {', '.join(missing)}")
+    payload = {f: "" if row.get(f) is None else row[f] for f in PAYLOAD_FIELDS}
+    for f in LIST_FIELDS:
+        if isinstance(payload[f], str):
+            payload[f] = [v.strip() for v in payload[f].split(";") if v.strip()]
+    for f in INT_FIELDS:
+        if payload[f] != "":
+            payload[f] = int(payload[f])
+    return payload
+
+
+def _codes(row: dict, default: list[str]) -> list[str]:
+    # optional per-row "bundle" (eu/nist/iso/complete) or "codes" (A00;A03)
+    if row.get("codes") not in (None, ""):
+        codes = row["codes"] if isinstance(row["codes"], list) else re.split(r"[;, ]+", row["codes"].strip())
+        codes = [c for c in codes if c]
+        if not codes:
+            raise ValueError("empty 'codes'")
+        return codes
+    if row.get("bundle"):
+        return BUNDLES[row["bundle"]]
+    return default
+
+
+def load_systems(path: str | pathlib.Path, default_codes: list[str]) -> list[dict]:
+    path = pathlib.Path(path)
+    with path.open(encoding="utf-8", newline="") as fh:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            rows = [json.loads(line) for line in fh if line.strip()]
+        else:
+            rows = list(csv.DictReader(fh))
+    seen: set[str] = set()
+    systems = []
+    for n, row in enumerate(rows, 1):
+        try:
+            systems.append({"id": _system_id(row, seen), "payload": _payload(row),
+                            "codes": _codes(row, default_codes)})
+        except (ValueError, KeyError) as e:
+            raise ValueError(f"{path.name} row {n}: {e}") from None
+    return systems
+
+
+def _groups(codes: list[str]):
+    # (index of the first code, codes) per request; one code each unless AIACTPACK_GROUP_SIZE > 1
+    first = 0
+    for group in engine.group_codes(codes):
+        yield first, group
+        first += len(group)
+
+
+def _generate(codes: list[str], payload: dict, queued_at: float) -> list[dict]:
+    if len(codes) > 1:
+        return engine.generate_group(codes, payload, queued_at=queued_at)
+    return [engine.generate_block(codes[0], payload, queued_at=queued_at)]
+
+
+def run(systems: list[dict], out_dir: str | pathlib.Path, max_concurrency: int = engine.MAX_CONCURRENCY,
+        pdf: bool = False, log=print) -> dict:
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    todo = [s for s in systems if not (out_dir / f"{s['id']}.zip").exists()]
+    skipped = len(systems) - len(todo)
+    if skipped:
+        log(f"skipping {skipped} system(s) with a finished pack")
+    if pdf:
+        from report import report_context, render_report_async
+
+    started = time.time()
+    results = {s["id"]: [None] * len(s["codes"]) for s in todo}
+    remaining = {s["id"]: len(s["codes"]) for s in todo}
+    records, failed, written = [], {}, 0
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        # systems are queued in file order, so they finish (and are written) roughly in order
+        futures = {pool.submit(_generate, group, s["payload"], time.time()): (s, first, len(group))
+                   for s in todo for first, group in _groups(s["codes"])}
+        for fut in as_completed(futures):
+            s, first, n = futures[fut]
+            try:
+                outs = fut.result()
+                results[s["id"]][first:first + n] = outs
+                records += [out["metrics"] for out in outs]
+            except Exception as e:
+                failed.setdefault(s["id"], repr(e))
+            remaining[s["id"]] -= n
+            if remaining[s["id"]]:
+                continue
+            if s["id"] in failed:
+                log(f"{s['id']}: FAILED ({failed[s['id']]})")
+                continue
+            # rate-limit placeholders are not a finished pack: leave it for the next run
+            limited = [out["code"] for out in results[s["id"]] if out["finish_reason"] == "rate_limit"]
+            if limited:
+                failed[s["id"]] = f"rate-limited: {', '.join(limited)}"
+                log(f"{s['id']}: incomplete, rate-limited blocks {', '.join(limited)}")
+                continue
+            with PackWriter(out_dir / f"{s['id']}.zip") as pack:
+                for out in results[s["id"]]:
+                    pack.add_block(out["code"], out["text"])
+                if pdf:
+                    pack.add_file(f"{s['id']}_report.pdf",
+                                  render_report_async(report_context(s["payload"], s["codes"])).result())
+            written += 1
+            truncated = [out["code"] for out in results[s["id"]] if out["truncated"]]
+            log(f"{s['id']}: {len(s['codes'])} blocks -> {pack.path}"
+                + (f" (truncated: {', '.join(truncated)})" if truncated else ""))
+            results.pop(s["id"])
+
+    wall = time.time() - started
+    blocks = len(records)
+    summary = {"systems": len(systems), "written": written, "skipped": skipped, "failed": len(failed),
+               "blocks": blocks, "cached": sum(bool(r.get("cached")) for r in records),
+               "wall_s": round(wall, 2), "blocks_per_s": round(blocks / wall, 2) if wall else None,
+               "systems_per_min": round(written * 60 / wall, 2) if wall else None,
+               "prompt_tokens": sum(r.get("prompt_tokens") or 0 for r in records),
+               "completion_tokens": sum(r.get("completion_tokens") or 0 for r in records),
+               "rate_limit_sleep_s": round(sum(r.get("rate_limit_sleep_s") or 0 for r in records), 2),
+               "retries": sum(r.get("retries") or 0 for r in records)}
+    metrics.log_pack(f"bulk:{out_dir.name}", records, pack_wall_s=round(wall, 4), systems=written)
+    return summary
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Generate AI Act packs for many systems from CSV/JSONL")
+    ap.add_argument("input", help="CSV or JSONL file, one wizard payload per row")
+    ap.add_argument("--out", default="packs", help="output directory (one ZIP per system)")
+    ap.add_argument("--bundle", default="complete", choices=sorted(BUNDLES),
+                    help="block set for rows without a 'bundle' or 'codes' column")
+    ap.add_argument("--concurrency", type=int, default=engine.MAX_CONCURRENCY,
+                    help="concurrent LLM calls across all systems")
+    ap.add_argument("--pdf", action="store_true", help="add the client PDF report to each ZIP")
+    args = ap.parse_args()
+    try:
+        systems = load_systems(args.input, BUNDLES[args.bundle])
+    except (OSError, ValueError) as e:
+        sys.exit(f"error: {e}")
+    summary = run(systems, args.out, args.concurrency, args.pdf)
+    print(json.dumps(summary, indent=2))
+    sys.exit(1 if summary["failed"] else 0)
@@ -0,0 +1,70 @@
+import time, json, hashlib, sqlite3, threading, pathlib
+
+##############################################################################
+# CONTENT-ADDRESSED BLOCK CACHE  (SQLite, size-based LRU + TTL)
+##############################################################################
+DEFAULT_PATH = pathlib.Path.home() / ".cache" / "aiactpack" / "blocks.sqlite"
+
+
+def cache_key(code: str, prompt: str, model: str, temperature: float, max_tokens: int) -> str:
+    raw = json.dumps([code, prompt, model, temperature, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class BlockCache:
+    def __init__(self, path: str | pathlib.Path = DEFAULT_PATH,
+                 max_bytes: int = 256 * 1024 * 1024, ttl: float = 30 * 86400):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes, self.ttl = max_bytes, ttl
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS blocks (key TEXT PRIMARY KEY, code TEXT, "
+                         "text TEXT, size INTEGER, created REAL, used REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS blocks_used ON blocks (used)")
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT text, created FROM blocks WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM blocks WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE blocks SET used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, code: str, text: str):
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, code, text, size, now, now))
+            self._evict(now)
+
+    def _evict(self, now: float):
+        self._db.execute("DELETE FROM blocks WHERE created < ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+        while total > self.max_bytes:
+            key, size = self._db.execute(
+                "SELECT key, size FROM blocks ORDER BY used LIMIT 1").fetchone()
+            self._db.execute("DELETE FROM blocks WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM blocks")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blocks").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
@@ -0,0 +1,16 @@
+##############################################################################
+# WIZARD FIELDS + BUNDLE CATALOGUE
+# Kept free of heavy imports so home.py can load it on every rerun.
+##############################################################################
+# wizard fields handed to the prompts (home.py section 13)
+PAYLOAD_FIELDS = ("sector", "model_name", "n_users", "high_risk", "data_modal",
+                  "deploy_env", "ce_mark", "target_mkt", "sandbox", "model_family", "data_sources")
+# the wizard refuses to submit without these; every other field may be left empty
+REQUIRED_FIELDS = ("model_name", "data_sources")
+
+BUNDLES = {
+    "eu":   ["A00"] + [f"A{j:02d}" for j in range(1, 21)],
+    "nist": [f"B{j:02d}" for j in range(1, 15)],
+    "iso":  [f"C{j:02d}" for j in range(1, 14)],
+}
+BUNDLES["complete"] = BUNDLES["eu"] + BUNDLES["nist"] + BUNDLES["iso"]
@@ -1,43 +1,367 @@
 # engine.py
-import os, pathlib, datetime, zipfile, csv, json, tempfile, time
-from jinja2 import Template
+import os, re, pathlib, datetime, zipfile, csv, json, tempfile, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import openai
 from openai import RateLimitError
+from limiter import RateLimiter, retry_after, jitter_backoff
+from cache import BlockCache, cache_key, DEFAULT_PATH as CACHE_PATH
+from registry import PromptRegistry
+from metrics import metrics, new_stats
+from catalog import PAYLOAD_FIELDS, BUNDLES
+from backends import OpenAIBackend, StubBackend, hedged
+import rules
+from budgets import TokenBudgets
+from semantic import SemanticCache
 
 
 PROMPTS_DIR   = pathlib.Path(__file__).with_suffix('').parent / "prompts"
 TEMPLATES_DIR = pathlib.Path(__file__).with_suffix('').parent / "templates"
 print("OPENAI_KEY present:", bool(os.getenv("OPENAI_KEY")))
-client        = openai.OpenAI(api_key=os.getenv("OPENAI_KEY"))
+# AIACTPACK_BASE_URL points the client at any OpenAI-compatible server;
+# 429s are retried by _request (limiter, shared pause, metrics), not the SDK
+client        = openai.OpenAI(api_key=os.getenv("OPENAI_KEY"), base_url=os.getenv("AIACTPACK_BASE_URL") or None,
+                              max_retries=0)
 RATE_LIMIT_PAUSE = 15
 MAX_RETRIES      = 5
+MAX_CONCURRENCY  = int(os.getenv("AIACTPACK_CONCURRENCY", "8"))
+MODEL            = os.getenv("AIACTPACK_MODEL", "gpt-3.5-turbo")
+TEMPERATURE      = 0.2
+# AIACTPACK_BACKEND=stub answers deterministically without a network
+backend          = (StubBackend(MODEL) if os.getenv("AIACTPACK_BACKEND") == "stub"
+                    else OpenAIBackend(client, MODEL, TEMPERATURE))
+# per-block model, e.g. AIACTPACK_BLOCK_MODELS="A08=gpt-4o-mini,C01=gpt-4o"
+BLOCK_MODELS     = dict(item.split("=", 1) for item in os.getenv("AIACTPACK_BLOCK_MODELS", "").split(",") if "=" in item)
+# secondary for hedged requests: another server and/or another model
+HEDGE_BASE_URL   = os.getenv("AIACTPACK_HEDGE_BASE_URL")
+HEDGE_MODEL      = os.getenv("AIACTPACK_HEDGE_MODEL")
+hedge_backend    = (OpenAIBackend(openai.OpenAI(api_key=os.getenv("AIACTPACK_HEDGE_KEY") or os.getenv("OPENAI_KEY") or "-",
+                                                base_url=HEDGE_BASE_URL, max_retries=0), HEDGE_MODEL or MODEL, TEMPERATURE)
+                    if HEDGE_BASE_URL else
+                    OpenAIBackend(client, HEDGE_MODEL, TEMPERATURE) if HEDGE_MODEL else None)
+MAX_TOKENS       = 700
+# account quota; set AIACTPACK_LIMITER_DB to share the budget across workers
+limiter          = RateLimiter(rpm=int(os.getenv("OPENAI_RPM", "3500")),
+                               tpm=int(os.getenv("OPENAI_TPM", "160000")),
+                               db_path=os.getenv("AIACTPACK_LIMITER_DB"))
+# set AIACTPACK_CACHE_DB="" to disable the block cache
+CACHE_DB         = os.environ.get("AIACTPACK_CACHE_DB", str(CACHE_PATH))
+block_cache      = BlockCache(CACHE_DB) if CACHE_DB else None
+# set AIACTPACK_SEMANTIC_DB to reuse near-identical answers across customers
+SEMANTIC_DB      = os.getenv("AIACTPACK_SEMANTIC_DB")
+semantic_cache   = (SemanticCache(SEMANTIC_DB, threshold=float(os.getenv("AIACTPACK_SEMANTIC_THRESHOLD", "0.95")))
+                    if SEMANTIC_DB else None)
+RATE_LIMIT_MSG   = "[Rate-limit – verify manually]"
+# per-code max_tokens learned from past completions (budgets.py); set
+# AIACTPACK_BUDGETS_FILE to keep what was learned across restarts
+budgets          = TokenBudgets(MAX_TOKENS, os.getenv("AIACTPACK_BUDGETS_FILE"))
+MAX_CONTINUATIONS = int(os.getenv("AIACTPACK_MAX_CONTINUATIONS", "2"))
+CONTINUE_PROMPT  = ("Your answer was cut off. Continue exactly where it stops, "
+                    "without repeating anything and without a preamble.")
+
+prompts          = PromptRegistry(PROMPTS_DIR)
+_undefined       = prompts.validate(PAYLOAD_FIELDS)
+if _undefined:
+    raise ValueError(f"Prompts reference unknown wizard fields: {_undefined}")
+
+def changed_fields(old: dict, new: dict) -> set[str]:
+    return {k for k in set(old) | set(new)
+            if json.dumps(old.get(k), sort_keys=True, default=str) != json.dumps(new.get(k), sort_keys=True, default=str)}
+
+def affected_codes(codes: list[str], old: dict, new: dict) -> list[str]:
+    # codes whose prompt references a changed field (or the whole payload via ctx);
+    # fast-path blocks read other fields and cost nothing, so they always re-render
+    changed = changed_fields(old, new)
+    return [code for code in codes
+            if changed and (rules.fast_path(code) or "ctx" in prompts.variables(code))
+            or prompts.variables(code) & changed]
 
 def load_prompt(code: str) -> str:
-    return (PROMPTS_DIR / f"{code}.txt").read_text(encoding="utf-8")
+    return prompts.source(code)
 
-def call_llm(code: str, prompt: str) -> str:
+def render_prompt(code: str, payload: dict) -> str:
+    return prompts.render(code, payload)
+
+def estimate_tokens(prompt: str | list[dict], max_tokens: int = MAX_TOKENS) -> int:
+    if isinstance(prompt, list):
+        prompt = "".join(m["content"] for m in prompt)
+    return len(prompt) // 4 + max_tokens
+
+def backend_for(code: str):
+    # grouped requests ("A00+A01") use the model of their first code
+    return backend.for_model(BLOCK_MODELS.get(code.split("+")[0]))
+
+##############################################################################
+# COMPLETE ONE PROMPT (returns (text, finish_reason))
+# on_chunk(text) switches to streaming and receives each delta as it arrives.
+# max_tokens defaults to the code's learned budget; an answer cut off at the
+# budget is continued (up to MAX_CONTINUATIONS more calls) and stitched.
+##############################################################################
+def block_key(code: str, prompt: str, max_tokens: int = MAX_TOKENS) -> str:
+    return cache_key(code, prompt, backend_for(code).model, TEMPERATURE, max_tokens)
+
+def _request(code: str, messages: list[dict], max_tokens: int, on_chunk, stats: dict):
+    # one call with rate-limit retries -> (text, finish_reason, usage), None if rate-limited out
+    reserved = estimate_tokens(messages, max_tokens)
+    primary = backend_for(code)
+    # a hedge on the same account spends quota like any other request
+    shares_quota = getattr(hedge_backend, "client", None) is getattr(primary, "client", False)
     for attempt in range(1, MAX_RETRIES + 1):
+        stats["rate_limit_sleep_s"] += limiter.acquire(reserved)
         try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.2,
-                max_tokens=700
-            )
-            return response.choices[0].message.content
-        except RateLimitError:
-            time.sleep(RATE_LIMIT_PAUSE * attempt)
-    return f"[Rate-limit – verify manually] {code}"
-
-##############################################################################
-# BUILD SINGLE BLOCK (returns pathlib.Path to .md file)
-##############################################################################
-def build_block(code: str, payload: dict) -> pathlib.Path:
-    tmpdir = pathlib.Path(tempfile.mkdtemp(prefix=f"block_{code}_"))
-    md_path = tmpdir / f"{code}.md"
-    resp = call_llm(code, Template(load_prompt(code)).render(ctx=payload))
-    md_path.write_text(resp, encoding="utf-8")
-    return md_path
+            text, finish_reason, usage = hedged(
+                primary, hedge_backend, messages, max_tokens, on_chunk=on_chunk,
+                on_headers=limiter.observe, stats=stats,
+                on_hedge=(lambda: limiter.acquire(reserved)) if shares_quota else None,
+                on_hedge_skipped=(lambda: limiter.refund(reserved)) if shares_quota else None)
+            if usage:
+                limiter.refund(reserved - usage.total_tokens)
+            return text, finish_reason, usage
+        except RateLimitError as e:
+            stats["retries"] += 1
+            headers = getattr(e.response, "headers", None)
+            limiter.observe(headers)
+            wait = retry_after(headers)
+            if wait is not None:
+                limiter.pause(wait)
+            else:
+                wait = jitter_backoff(attempt, RATE_LIMIT_PAUSE)
+                time.sleep(wait)
+                stats["rate_limit_sleep_s"] += wait
+    return None
+
+def complete(code: str, prompt: str, on_chunk=None, stats: dict | None = None,
+             max_tokens: int | None = None) -> tuple[str, str]:
+    # stats (see metrics.new_stats) receives retries, rate-limit sleep and token usage
+    stats = stats if stats is not None else new_stats()
+    # only complete ("stop") answers are cached, so the key ignores the budget
+    key = block_key(code, prompt)
+    if block_cache:
+        cached = block_cache.get(key)
+        if cached is not None:
+            stats["cached"] = True
+            if on_chunk:
+                on_chunk(cached)
+            return cached, "stop"
+    max_tokens = max_tokens or budgets.get(code)
+    messages = [{"role": "user", "content": prompt}]
+    text, finish_reason = "", None
+    for turn in range(MAX_CONTINUATIONS + 1):
+        out = _request(code, messages, max_tokens, on_chunk, stats)
+        if out is None:
+            if not text:
+                text = f"{RATE_LIMIT_MSG} {code}"
+                if on_chunk:
+                    on_chunk(text)
+                return text, "rate_limit"
+            break                       # keep what we have, flagged as cut off
+        piece, finish_reason, usage = out
+        text += piece
+        stats["prompt_tokens"] += usage.prompt_tokens if usage else 0
+        stats["completion_tokens"] += usage.completion_tokens if usage else len(piece) // 4
+        if finish_reason != "length" or not piece or turn == MAX_CONTINUATIONS:
+            break
+        stats["continuations"] += 1
+        messages = [messages[0], {"role": "assistant", "content": text},
+                    {"role": "user", "content": CONTINUE_PROMPT}]
+    if "+" not in code:
+        budgets.record(code, stats["completion_tokens"])
+    # truncated outputs are not cached so a retry can do better
+    if block_cache and text and finish_reason == "stop":
+        block_cache.put(key, code, text)
+    return text, finish_reason
+
+def call_llm(code: str, prompt: str) -> str:
+    return complete(code, prompt)[0]
+
+##############################################################################
+# GENERATE SINGLE BLOCK IN MEMORY (returns dict with the block text)
+##############################################################################
+def semantic_fields(code: str, payload: dict) -> dict:
+    names = prompts.variables(code)
+    return dict(payload) if "ctx" in names else {k: payload[k] for k in names if k in payload}
+
+def _semantic_scope(code: str) -> str:
+    return SemanticCache.scope(code, prompts.source(code), backend_for(code).model)
+
+def semantic_get(code: str, payload: dict, stats: dict) -> str | None:
+    if not semantic_cache:
+        return None
+    stats["semantic_lookup"] = True
+    hit = semantic_cache.get(_semantic_scope(code), semantic_fields(code, payload))
+    if hit is None:
+        return None
+    stats["semantic_hit"] = True
+    return hit[0]
+
+def semantic_put(code: str, payload: dict, text: str):
+    if semantic_cache and text:
+        semantic_cache.put(_semantic_scope(code), semantic_fields(code, payload), text)
+
+def generate_block(code: str, payload: dict, on_chunk=None, queued_at: float | None = None) -> dict:
+    started = time.time()
+    chunk = (lambda piece: on_chunk(code, piece)) if on_chunk else None
+    stats = new_stats()
+    if rules.fast_path(code):
+        # rendered locally from the payload, no LLM call
+        text, finish_reason = rules.render(code, payload), "stop"
+        stats["fast_path"] = True
+        if chunk:
+            chunk(text)
+    elif (text := semantic_get(code, payload, stats)) is not None:
+        # near-duplicate of an earlier customer's block, entities substituted
+        finish_reason = "stop"
+        if chunk:
+            chunk(text)
+    else:
+        text, finish_reason = complete(code, render_prompt(code, payload), on_chunk=chunk, stats=stats)
+        if finish_reason == "stop" and not stats["cached"]:
+            semantic_put(code, payload, text)
+    rec = {"code": code, "wall_s": time.time() - started,
+           "queue_wait_s": started - queued_at if queued_at else 0.0,
+           "finish_reason": finish_reason, "output_bytes": len(text.encode("utf-8")), **stats}
+    metrics.record(rec)
+    return {"code": code, "text": text, "finish_reason": finish_reason,
+            "truncated": finish_reason == "length", "summary": {}, "metrics": rec}
+
+##############################################################################
+# BUILD SINGLE BLOCK (returns dict with pathlib.Path to .md file)
+# stream=True appends each delta to the .md file as it arrives; without
+# out_dir the file goes to a fresh temp dir the caller must clean up
+##############################################################################
+def build_block(code: str, payload: dict, stream: bool = False, on_chunk=None,
+                out_dir: pathlib.Path | None = None, queued_at: float | None = None) -> dict:
+    if out_dir is None:
+        out_dir = tempfile.mkdtemp(prefix=f"aiactpack_block_{code}_")
+    md_path = pathlib.Path(out_dir) / f"{code}.md"
+    if stream or on_chunk:
+        with md_path.open("w", encoding="utf-8") as fh:
+            def _write(c: str, piece: str):
+                fh.write(piece)
+                fh.flush()
+                if on_chunk:
+                    on_chunk(c, piece)
+            out = generate_block(code, payload, on_chunk=_write, queued_at=queued_at)
+    else:
+        out = generate_block(code, payload, queued_at=queued_at)
+        md_path.write_text(out["text"], encoding="utf-8")
+    out["file_path"] = md_path
+    return out
+
+def _pool_size(codes: list[str], max_concurrency: int) -> int:
+    return max(1, min(max_concurrency, len(codes) or 1))
+
+##############################################################################
+# BUILD MANY BLOCKS CONCURRENTLY (results in the order of `codes`)
+# on_progress(code, result, done, total) is called from the caller's thread
+##############################################################################
+def build_blocks(codes: list[str], payload: dict,
+                 max_concurrency: int = MAX_CONCURRENCY,
+                 on_progress=None, out_dir: pathlib.Path | None = None) -> list[dict]:
+    out_dir = out_dir or tempfile.mkdtemp(prefix="aiactpack_blocks_")
+    results: list[dict] = [None] * len(codes)
+    with ThreadPoolExecutor(max_workers=_pool_size(codes, max_concurrency)) as pool:
+        futures = {pool.submit(build_block, code, payload, out_dir=out_dir, queued_at=time.time()): i
+                   for i, code in enumerate(codes)}
+        for done, fut in enumerate(as_completed(futures), 1):
+            i = futures[fut]
+            results[i] = fut.result()
+            if on_progress:
+                on_progress(codes[i], results[i], done, len(codes))
+    return results
+
+##############################################################################
+# MULTI-BLOCK REQUESTS
+# Several related codes (same family, consecutive) go out as one request: the
+# shared preamble is sent once and each task is answered inside BEGIN/END
+# markers.  Sections that are missing, unterminated or cut off fall back to a
+# single-block call; parsed sections are cached under their own block key.
+# Off by default: AIACTPACK_GROUP_SIZE > 1 turns it on for jobs and bulk.py.
+##############################################################################
+GROUP_SIZE       = int(os.getenv("AIACTPACK_GROUP_SIZE", "1"))
+GROUP_MAX_TOKENS = 4096
+_SECTION         = re.compile(r"=== BEGIN (\w+) ===\s*\n(.*?)\n?=== END \1 ===", re.S)
+
+def group_codes(codes: list[str], size: int = GROUP_SIZE) -> list[list[str]]:
+    groups: list[list[str]] = []
+    for code in codes:
+        if (groups and groups[-1][0][0] == code[0] and len(groups[-1]) < size
+                and BLOCK_MODELS.get(groups[-1][0]) == BLOCK_MODELS.get(code)):
+            groups[-1].append(code)
+        else:
+            groups.append([code])
+    return groups
+
+def group_prompt(prompts: dict[str, str]) -> str:
+    split = {code: p.splitlines() for code, p in prompts.items()}
+    shared = []
+    for lines in zip(*split.values()):
+        if len(set(lines)) != 1 or not lines[0].strip() and not shared:
+            break
+        shared.append(lines[0])
+    cut = len(shared)                   # blank lines after the preamble are not repeated per task
+    while shared and not shared[-1].strip():
+        shared.pop()
+    out = shared + ["",
+                    f"Complete the {len(prompts)} independent tasks below. Answer each one in full, "
+                    "exactly as if it had been asked on its own, and wrap every answer in its markers:",
+                    "=== BEGIN <code> ===", "<answer>", "=== END <code> ===",
+                    "Output nothing outside the markers."]
+    for code, lines in split.items():
+        out += ["", f"--- TASK {code} ---"] + lines[cut:]
+    return "\n".join(out).strip()
+
+def split_sections(text: str) -> dict[str, str]:
+    return {code: body.strip() for code, body in _SECTION.findall(text)}
+
+def generate_group(codes: list[str], payload: dict, queued_at: float | None = None) -> list[dict]:
+    started = time.time()
+    prompts = {code: render_prompt(code, payload) for code in codes}
+    results: dict[str, dict] = {}
+    for code, prompt in prompts.items():
+        if rules.fast_path(code):
+            continue
+        cached = block_cache.get(block_key(code, prompt)) if block_cache else None
+        if cached is not None:
+            results[code] = {"text": cached, "finish_reason": "stop", "stats": {"cached": True}}
+            continue
+        stats = new_stats()
+        text = semantic_get(code, payload, stats)
+        if text is not None:
+            results[code] = {"text": text, "finish_reason": "stop", "stats": stats}
+    todo = [code for code in codes if code not in results and not rules.fast_path(code)]
+    if len(todo) > 1:
+        stats = new_stats()
+        max_tokens = min(GROUP_MAX_TOKENS, sum(budgets.get(c) for c in todo))
+        text, finish_reason = complete("+".join(todo), group_prompt({c: prompts[c] for c in todo}),
+                                       stats=stats, max_tokens=max_tokens)
+        # the request itself goes to the group series; per-code series only see its blocks
+        metrics.record_group({"codes": todo, "wall_s": time.time() - started,
+                              "queue_wait_s": started - queued_at if queued_at else 0.0,
+                              "finish_reason": finish_reason, "output_bytes": len(text.encode("utf-8")), **stats})
+        sections = {code: body for code, body in split_sections(text).items() if code in todo and body}
+        # token usage is shared out by answer length so per-code and per-pack totals stay right
+        total = sum(len(body) for body in sections.values()) or 1
+        for code, body in sections.items():
+            share = len(body) / total
+            results[code] = {"text": body, "finish_reason": "stop",
+                             "stats": {"prompt_tokens": round(stats["prompt_tokens"] * share),
+                                       "completion_tokens": round(stats["completion_tokens"] * share)}}
+            if block_cache:
+                block_cache.put(block_key(code, prompts[code]), code, body)
+            semantic_put(code, payload, body)
+    out = []
+    for code in codes:
+        if code in results:
+            r = results[code]
+            rec = {"code": code, "wall_s": time.time() - started, "grouped": True,
+                   "finish_reason": r["finish_reason"], "output_bytes": len(r["text"].encode("utf-8")),
+                   **new_stats(), **r["stats"]}
+            metrics.record(rec)
+            out.append({"code": code, "text": r["text"], "finish_reason": r["finish_reason"],
+                        "truncated": False, "summary": {}, "metrics": rec})
+        else:
+            out.append(generate_block(code, payload, queued_at=queued_at))
+    return out
 
 ##############################################################################
 # ZIP SINGLE BLOCK (returns pathlib.Path to .zip file)
@@ -0,0 +1,158 @@
+import re, json, time, random, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+##############################################################################
+# LOCAL STAND-IN FOR THE CHAT-COMPLETIONS ENDPOINT
+# Configurable latency, completion size and 429 injection; speaks both the
+# plain and the streamed (SSE) response format plus x-ratelimit-* headers.
+# Multi-block prompts (engine.group_prompt) get one marked section per task.
+#   python fake_openai.py --port 8600 --latency 0.8 --rate-429 0.05
+##############################################################################
+class FakeOpenAI:
+    def __init__(self, latency: float = 0.5, jitter: float = 0.2, completion_tokens: int = 300,
+                 rate_429: float = 0.0, retry_after_ms: int = 200, finish_reason: str = "stop",
+                 host: str = "127.0.0.1", port: int = 0, seed: int | None = None):
+        self.latency, self.jitter = latency, jitter
+        self.completion_tokens, self.finish_reason = completion_tokens, finish_reason
+        self.rate_429, self.retry_after_ms = rate_429, retry_after_ms
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "rate_limited": 0, "completion_tokens": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _delay(self) -> float:
+        return max(0.0, self.rng.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status: int, body: dict, headers: dict | None = None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+                with fake._lock:
+                    fake.stats["requests"] += 1
+                    limited = fake.rng.random() < fake.rate_429
+                    if limited:
+                        fake.stats["rate_limited"] += 1
+                if limited:
+                    return self._json(429, {"error": {"message": "Rate limit reached", "type": "requests",
+                                                      "code": "rate_limit_exceeded"}},
+                                      {"retry-after-ms": str(fake.retry_after_ms),
+                                       "x-ratelimit-remaining-requests": "0",
+                                       "x-ratelimit-reset-requests": f"{fake.retry_after_ms}ms"})
+
+                messages = body.get("messages", [])
+                prompt = " ".join(m.get("content", "") for m in messages)
+                # continuation requests carry the text so far as an assistant turn
+                done = sum(len(re.findall(r"\bw\d+\b", m.get("content", ""))) for m in messages
+                           if m.get("role") == "assistant")
+                tasks = re.findall(r"^--- TASK (\w+) ---$", messages[0].get("content", "") if messages else "", re.M)
+                total = fake.completion_tokens * max(1, len(tasks))
+                left = max(0, total - done)
+                n_out = min(left, body.get("max_tokens") or left)
+                finish = "length" if n_out < left else fake.finish_reason
+                words = [f"w{i}" for i in range(done, done + n_out)]
+                pieces = [w if i == 0 and not done else " " + w for i, w in enumerate(words)]
+                if tasks:
+                    # w<i> of task k lands in its section: markers around every completion_tokens words
+                    for i in range(len(pieces)):
+                        k, j = divmod(done + i, fake.completion_tokens)
+                        if j == 0:
+                            pieces[i] = f"=== BEGIN {tasks[k]} ===\n{words[i]}"
+                        if j == fake.completion_tokens - 1:
+                            pieces[i] += f"\n=== END {tasks[k]} ===\n"
+                usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": n_out,
+                         "total_tokens": len(prompt) // 4 + n_out}
+                with fake._lock:
+                    fake.stats["completion_tokens"] += n_out
+                headers = {"x-ratelimit-remaining-requests": "10000",
+                           "x-ratelimit-remaining-tokens": "10000000"}
+                delay = fake._delay()
+
+                if not body.get("stream"):
+                    time.sleep(delay)
+                    return self._json(200, {
+                        "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [{"index": 0, "finish_reason": finish,
+                                     "message": {"role": "assistant",
+                                                 "content": "".join(pieces)}}],
+                        "usage": usage}, headers)
+
+                self.send_response(200)
+                self.send_header("content-type", "text/event-stream")
+                self.send_header("connection", "close")
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                step = delay / max(1, len(words))
+                base = {"id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                        "created": int(time.time()), "model": body.get("model", "fake")}
+                for piece in pieces:
+                    time.sleep(step)
+                    chunk = dict(base, choices=[{"index": 0, "finish_reason": None,
+                                                 "delta": {"content": piece}}])
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                last = dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": finish}])
+                self.wfile.write(f"data: {json.dumps(last)}\n\n".encode())
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    self.wfile.write(f"data: {json.dumps(dict(base, choices=[], usage=usage))}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Local fake chat-completions server")
+    ap.add_argument("--port", type=int, default=8600)
+    ap.add_argument("--latency", type=float, default=0.5)
+    ap.add_argument("--jitter", type=float, default=0.2)
+    ap.add_argument("--tokens", type=int, default=300)
+    ap.add_argument("--rate-429", type=float, default=0.0)
+    a = ap.parse_args()
+    srv = FakeOpenAI(a.latency, a.jitter, a.tokens, a.rate_429, port=a.port)
+    print("fake OpenAI listening on", srv.base_url)
+    try:
+        srv._server.serve_forever()
+    except KeyboardInterrupt:
+        srv.stop()
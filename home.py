@@ -3,11 +3,9 @@
 #  NOWPayments crypto checkout + auto client PDF report
 #  Logo: AIACTPack.png  (served on VPS)
 # ---------------------------------------------------------
-import os, time, shutil, tempfile, zipfile, base64
+import os, time, shutil, base64, logging
 from pathlib import Path
 import streamlit as st
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from weasyprint import HTML, CSS
 
 
 
@@ -23,7 +21,7 @@ CALENDLY_URL  = "https://calendly.com/aiactpack/expert"
 # ------------------------------------------------------------------
 #  1.  SESSION-STATE INITIALISATION  (no AttributeError)
 # ------------------------------------------------------------------
-for k, v in (("zips", []), ("cart", []), ("checkout_url", None)):
+for k, v in (("zips", []), ("cart", []), ("checkout_url", None), ("job_id", None)):
     st.session_state.setdefault(k, v)
 
 # ------------------------------------------------------------------
@@ -64,11 +62,32 @@ NOW_LINKS = {
 #  5.  TEST-MODE SWITCH
 # ------------------------------------------------------------------
 TEST_MODE = st.query_params.get("test") == "1"
+# start likely blocks while the wizard is still being filled in (see speculate.py)
+SPECULATE = os.getenv("AIACTPACK_SPECULATE") == "1"
 
 # ------------------------------------------------------------------
 #  6.  ENGINE
 # ------------------------------------------------------------------
-from engine import build_block
+# the engine (openai, prompt registry, job workers) is only imported the first
+# time a pack is generated or polled; catalog is a plain constants module
+from catalog import PAYLOAD_FIELDS, BUNDLES
+
+@st.cache_resource(show_spinner=False)
+def _job_queue():
+    # one worker pool per server process; unfinished jobs resume on start
+    import metrics
+    from jobs import JobQueue, DEFAULT_PATH as JOBS_DB
+    logging.getLogger("aiactpack").setLevel(logging.INFO)
+    if not logging.getLogger("aiactpack").handlers:
+        logging.getLogger("aiactpack").addHandler(logging.StreamHandler())
+    if os.getenv("AIACTPACK_METRICS_PORT"):
+        metrics.serve(int(os.getenv("AIACTPACK_METRICS_PORT")))
+    return JobQueue(os.getenv("AIACTPACK_JOBS_DB", JOBS_DB))
+
+@st.cache_resource(show_spinner=False)
+def _pack_store():
+    from pack import PackStore
+    return PackStore()
 
 # ------------------------------------------------------------------
 #  7.  PAGE CONFIG
@@ -247,19 +266,38 @@ if SAMPLE_PDF_B64:
 # ------------------------------------------------------------------
 #  12.  LEAD MAGNET
 # ------------------------------------------------------------------
-with st.container(border=True):
-    st.markdown("### 🎯 Free EU AI-Act Readiness Score (2 min)")
-    c1, c2 = st.columns([3, 1])
-    with c1:
-        email = st.text_input("Business email", placeholder="alice@company.com")
-    with c2:
-        st.markdown("<div style='height:28px'></div>", unsafe_allow_html=True)
-        if st.button("Get my score →", type="primary"):
-            if "@" not in email:
-                st.error("Please enter a valid email.")
-            else:
-                st.success("Check your inbox—link on its way!")
-                st.balloons()
+# the score is computed locally by rules.readiness_score (no LLM call)
+@st.fragment
+def _lead_magnet():
+    from rules import readiness_score
+    with st.container(border=True):
+        st.markdown("### 🎯 Free EU AI-Act Readiness Score (2 min)")
+        q1, q2, q3, q4 = st.columns(4)
+        with q1:
+            sector = st.selectbox("Sector", ["FinTech", "HealthTech", "HR-tech", "AdTech", "Retail", "CyberSec", "Auto", "Other"], key="score_sector")
+        with q2:
+            high_risk = st.selectbox("Annex III use-case", ["None", "Biometric ID", "HR / recruitment", "Credit scoring", "Insurance pricing"], key="score_high_risk")
+        with q3:
+            ce_mark = st.selectbox("CE-marked?", ["Yes", "No", "Partial"], key="score_ce_mark")
+        with q4:
+            sandbox = st.selectbox("AI sandbox?", ["Yes", "No"], key="score_sandbox")
+        c1, c2 = st.columns([3, 1])
+        with c1:
+            email = st.text_input("Business email", placeholder="alice@company.com")
+        with c2:
+            st.markdown("<div style='height:28px'></div>", unsafe_allow_html=True)
+            if st.button("Get my score →", type="primary"):
+                if "@" not in email:
+                    st.error("Please enter a valid email.")
+                else:
+                    result = readiness_score({"sector": sector, "high_risk": high_risk, "ce_mark": ce_mark,
+                                              "sandbox": sandbox, "data_modal": [], "data_sources": "n/a"})
+                    st.metric("Readiness score", f"{result['score']}/100", result["band"])
+                    for why in result["gaps"]:
+                        st.markdown(f"- {why}")
+                    st.success("Check your inbox—full breakdown on its way!")
+                    st.balloons()
+_lead_magnet()
 
 # ------------------------------------------------------------------
 #  13.  ANCHOR + WIZARD
@@ -267,176 +305,192 @@ with st.container(border=True):
 st.markdown('<div id="wizard"></div>', unsafe_allow_html=True)
 st.markdown("### 🧭 10-Question Compliance Wizard")
 
-with st.form("aiactpack_wizard"):
-    col1, col2 = st.columns(2)
-    with col1:
-        sector       = st.selectbox("Industry sector *", ["FinTech", "HealthTech", "HR-tech", "AdTech", "Retail", "CyberSec", "Auto", "Other"])
-        model_name   = st.text_input("Model trade name *", placeholder="CreditGPT-3")
-        n_users      = st.number_input("Expected EU users *", 0, 50_000_000, 5_000, 1_000)
-        high_risk    = st.selectbox("High-risk Annex III use-case *", ["None", "Biometric ID", "HR / recruitment", "Credit scoring", "Insurance pricing"])
-        data_modal   = st.multiselect("Data modalities", ["Text", "Image", "Tabular", "Audio", "Video"], default=["Text"])
-    with col2:
-        deploy_env   = st.selectbox("Deployment environment", ["AWS", "Azure", "GCP", "On-prem", "Hybrid"])
-        ce_mark      = st.selectbox("Already CE-marked HW/SW ?", ["Yes", "No", "Partial"])
-        target_mkt   = st.multiselect("Target jurisdictions", ["EU", "UK", "USA", "Canada", "APAC"], default=["EU"])
-        sandbox      = st.selectbox("Participated in EU AI sandbox ?", ["Yes", "No"])
-        model_family = st.selectbox("Model family", ["GPT-3.5-turbo", "GPT-4", "Llama-3", "Claude-3", "Gemini", "Custom transformer", "Tree-based"])
-    data_sources = st.text_area("Training data sources (1 per line) *", placeholder="wikimedia.org\ninternal-2022-2024.csv")
-
-    mode = st.radio(
-        "Select purchase mode:",
-        ["Individual prompts (€50 each)", "Individual bundle", "Complete bundle (€1 997)"],
-        help="Pay only for what you need.",
-    )
-    selected_individual: list[str] = []
-    bundle_choice: str | None = None
-
-    if mode == "Individual prompts (€50 each)":
-        st.markdown("#### Select individual prompts")
-        for family, codes, cols, icon in (
-            ("EU AI-Act",   ["A00"] + [f"A{j:02d}" for j in range(1, 21)], 4, "document"),
-            ("NIST AI RMF", [f"B{j:02d}" for j in range(1, 15)],          4, "shield"),
-            ("ISO 42001",   [f"C{j:02d}" for j in range(1, 14)],          4, "clipboard"),
-        ):
-            st.markdown(f"**{family}**")
-            columns = st.columns(cols)
-            for i, code in enumerate(codes):
-                with columns[i % cols]:
-                    if st.checkbox(f"{code} (€50)", value=False, key=code):
-                        selected_individual.append(code)
-
-    elif mode == "Individual bundle":
-        bundle_choice = st.radio(
-            "Which bundle do you need?",
-            ["EU AI-Act  (€899)", "NIST AI RMF  (€599)", "ISO 42001  (€549)"],
-            horizontal=True,
+# the form lives in a fragment: submitting it reruns only the wizard until a
+# job is queued, then one full rerun shows the progress area.  Speculation
+# needs every answer as it is given, so the widgets are not wrapped in a form.
+@st.fragment
+def _wizard():
+    with st.container() if SPECULATE else st.form("aiactpack_wizard"):
+        col1, col2 = st.columns(2)
+        with col1:
+            sector       = st.selectbox("Industry sector *", ["FinTech", "HealthTech", "HR-tech", "AdTech", "Retail", "CyberSec", "Auto", "Other"])
+            model_name   = st.text_input("Model trade name *", placeholder="CreditGPT-3")
+            n_users      = st.number_input("Expected EU users *", 0, 50_000_000, 5_000, 1_000)
+            high_risk    = st.selectbox("High-risk Annex III use-case *", ["None", "Biometric ID", "HR / recruitment", "Credit scoring", "Insurance pricing"])
+            data_modal   = st.multiselect("Data modalities", ["Text", "Image", "Tabular", "Audio", "Video"], default=["Text"])
+        with col2:
+            deploy_env   = st.selectbox("Deployment environment", ["AWS", "Azure", "GCP", "On-prem", "Hybrid"])
+            ce_mark      = st.selectbox("Already CE-marked HW/SW ?", ["Yes", "No", "Partial"])
+            target_mkt   = st.multiselect("Target jurisdictions", ["EU", "UK", "USA", "Canada", "APAC"], default=["EU"])
+            sandbox      = st.selectbox("Participated in EU AI sandbox ?", ["Yes", "No"])
+            model_family = st.selectbox("Model family", ["GPT-3.5-turbo", "GPT-4", "Llama-3", "Claude-3", "Gemini", "Custom transformer", "Tree-based"])
+        data_sources = st.text_area("Training data sources (1 per line) *", placeholder="wikimedia.org\ninternal-2022-2024.csv")
+
+        mode = st.radio(
+            "Select purchase mode:",
+            ["Individual prompts (€50 each)", "Individual bundle", "Complete bundle (€1 997)"],
+            help="Pay only for what you need.",
         )
-
-    submitted = st.form_submit_button("Generate selected packs →", type="primary")
-
-# ------------------------------------------------------------------
-#  14.  POST-SUBMIT  (build blocks + client PDF)
-# ------------------------------------------------------------------
-if submitted:
-    if not model_name or not data_sources:
-        st.error("Please complete mandatory fields."); st.stop()
-    if mode == "Individual bundle" and not bundle_choice:
-        st.error("Please select which individual bundle you need."); st.stop()
-
-    payload = {k: v for k, v in locals().items() if k in {
-        "sector", "model_name", "n_users", "high_risk", "data_modal",
-        "deploy_env", "ce_mark", "target_mkt", "sandbox", "model_family", "data_sources"
-    }}
-
-    if mode == "Individual prompts (€50 each)":
-        blocks = selected_individual
-    elif mode == "Individual bundle":
-        bundle_map = {
-            "EU AI-Act  (€899)":   ["A00"] + [f"A{j:02d}" for j in range(1, 21)],
-            "NIST AI RMF  (€599)": [f"B{j:02d}" for j in range(1, 15)],
-            "ISO 42001  (€549)":   [f"C{j:02d}" for j in range(1, 14)],
-        }
-        blocks = bundle_map[bundle_choice]
-    else:  # complete
-        blocks = ["A00"] + [f"A{j:02d}" for j in range(1, 21)] + \
-                 [f"B{j:02d}" for j in range(1, 15)] + \
-                 [f"C{j:02d}" for j in range(1, 14)]
-
-    if not blocks:
-        st.error("No blocks selected."); st.stop()
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir_path = Path(tmpdir)
-        built_files: list[Path] = []
-        real_outputs = {}
-        for code in blocks:
-            with st.spinner(f"Running {code} ..."):
-                out = build_block(code, payload)
-                built_files.append(out["file_path"])   # adapt to your engine
-                real_outputs[code] = out.get("summary", {})
-
-        # ----------------------------------------------------
-        # 14-A  render client-facing PDF
-        # ----------------------------------------------------
-        env = Environment(
-            loader=FileSystemLoader("templates"),
-            autoescape=select_autoescape(["html", "xml"])
-        )
-        template = env.get_template("report_template.html")
-        context = {
-            "trade_name": payload["model_name"],
-            "version": "2.1.14",
-            "provider": "Acme FinTech Ltd (IE)",
-            "high_risk_use_case": payload["high_risk"],
-            "deployment": payload["deploy_env"],
-            "n_users": payload["n_users"],
-            "model_family": payload["model_family"],
-            "overall_status": "no critical gaps" if "B05" in blocks else "minor gaps",
-            "risk_class": "High-risk (Annex III §6(a))",
-            "evidence_ready": 18,
-            "evidence_total": 20,
-            "effort_days": 6,
-            "gap_6a_status": "✅ Draft fairness report",
-            "transparency_status": "✅ Labelled AI; T&Cs updated",
-            "risk_mgmt_status": "✅",
-            "risk_mgmt_notes": "ISO 31000 aligned, v1.4 signed off",
-            "data_gov_status": "✅",
-            "data_gov_notes": "Training data sheet & bias audit",
-            "tech_doc_status": "✅",
-            "tech_doc_notes": "104-page doc pack under doc-control",
-            "module_b_status": "❌",
-            "module_b_notes": "Draft with NB; awaiting final quote",
-            "module_b_days": 3,
-            "nb_week": 28,
-        }
-        html = template.render(context)
-        client_report_path = tmpdir_path / f"EU_AI_Act_Report_{int(time.time())}.pdf"
-        HTML(string=html).write_pdf(
-            client_report_path,
-            stylesheets=[CSS(string="""
-                @page{size:A4;margin:2cm}
-                body{font-family:Helvetica,sans-serif;font-size:11pt}
-                table{width:100%;border-collapse:collapse}
-                th,td{border:1px solid #ccc;padding:6px}
-                th{background:#f5f5f5}
-            """)]
-        )
-
-        # ----------------------------------------------------
-        # 14-B  ZIP everything
-        # ----------------------------------------------------
-        pack_name = (
+        selected_individual: list[str] = []
+        bundle_choice: str | None = None
+
+        if mode == "Individual prompts (€50 each)":
+            st.markdown("#### Select individual prompts")
+            for family, codes, cols, icon in (
+                ("EU AI-Act",   BUNDLES["eu"],   4, "document"),
+                ("NIST AI RMF", BUNDLES["nist"], 4, "shield"),
+                ("ISO 42001",   BUNDLES["iso"],  4, "clipboard"),
+            ):
+                st.markdown(f"**{family}**")
+                columns = st.columns(cols)
+                for i, code in enumerate(codes):
+                    with columns[i % cols]:
+                        if st.checkbox(f"{code} (€50)", value=False, key=code):
+                            selected_individual.append(code)
+
+        elif mode == "Individual bundle":
+            bundle_choice = st.radio(
+                "Which bundle do you need?",
+                ["EU AI-Act  (€899)", "NIST AI RMF  (€599)", "ISO 42001  (€549)"],
+                horizontal=True,
+            )
+
+        submit_button = st.button if SPECULATE else st.form_submit_button
+        submitted = submit_button("Generate selected packs →", type="primary")
+
+    if SPECULATE:
+        from speculate import Speculation
+        if "speculation" not in st.session_state:
+            st.session_state.speculation = Speculation()
+        if not submitted:
+            st.session_state.speculation.update({k: v for k, v in locals().items() if k in PAYLOAD_FIELDS})
+
+    # ------------------------------------------------------------------
+    #  13-A.  SUBMIT  (queue a pack job)
+    # ------------------------------------------------------------------
+    if submitted:
+        if not model_name or not data_sources:
+            st.error("Please complete mandatory fields."); st.stop()
+        if mode == "Individual bundle" and not bundle_choice:
+            st.error("Please select which individual bundle you need."); st.stop()
+
+        payload = {k: v for k, v in locals().items() if k in PAYLOAD_FIELDS}
+
+        if mode == "Individual prompts (€50 each)":
+            blocks = selected_individual
+        elif mode == "Individual bundle":
+            bundle_map = {
+                "EU AI-Act  (€899)":   BUNDLES["eu"],
+                "NIST AI RMF  (€599)": BUNDLES["nist"],
+                "ISO 42001  (€549)":   BUNDLES["iso"],
+            }
+            blocks = bundle_map[bundle_choice]
+        else:  # complete
+            blocks = BUNDLES["complete"]
+
+        if not blocks:
+            st.error("No blocks selected."); st.stop()
+
+        pack_label = (
             "Complete_Bundle" if mode == "Complete bundle (€1 997)" else
             f"{bundle_choice.replace(' ', '_')}_Bundle" if mode == "Individual bundle" else
             "Individual_Prompts"
-        ) + f"_{int(time.time())}.zip"
-
-        final_zip = tmpdir_path / pack_name
-        with zipfile.ZipFile(final_zip, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for bf in built_files:
-                zf.write(bf, bf.name)
-            zf.write(client_report_path, client_report_path.name)
-
-        persist_dir = Path(tempfile.mkdtemp(prefix="aiactpack_"))
-        saved_zip = shutil.copy2(final_zip, persist_dir / final_zip.name)
-
-    st.session_state.zips = [saved_zip]
+        )
+        # an edit of the pack just built only re-runs the blocks whose prompts
+        # reference a changed answer; everything else is reused
+        prev = _job_queue().job(st.session_state.job_id) if st.session_state.job_id else None
+        if prev and prev["status"] == "completed" and prev["codes"] == blocks:
+            st.session_state.job_id, _ = _job_queue().regenerate(prev["id"], payload)
+        else:
+            speculative = st.session_state.speculation.take(payload, blocks) if SPECULATE else None
+            st.session_state.job_id = _job_queue().submit(blocks, payload, meta={"pack_label": pack_label},
+                                                          speculative=speculative)
+        st.session_state.zips = []
+        st.session_state.checkout_url = None
+        st.query_params["job"] = st.session_state.job_id
+        st.rerun()
+_wizard()
+
+# ------------------------------------------------------------------
+#  14.  POST-SUBMIT  (job progress, then build client PDF + zip)
+# ------------------------------------------------------------------
+# a browser refresh keeps the job: it is recovered from the URL
+job_id = st.session_state.job_id or st.query_params.get("job")
+jobs = _job_queue() if job_id else None
+job = jobs.job(job_id) if job_id else None
+
+
+@st.fragment(run_every=1.0)
+def _job_progress(job_id: str):
+    status = jobs.status(job_id)
+    st.progress(status["done"] / status["total"],
+                text=f"Running blocks ... {status['done']}/{status['total']} done")
+    with st.expander("Live output", expanded=False):
+        for code, text in jobs.partial(job_id).items():
+            st.markdown(f"**{code}**\n\n{text}")
+    if status["status"] != "running":
+        st.rerun()
+
+
+if job and job["status"] == "running":
+    _job_progress(job["id"])
+elif job and job["status"] == "failed":
+    failed = [out["code"] for out in jobs.results(job["id"]) if out["status"] == "failed"]
+    st.error(f"Generation failed for: {', '.join(failed)}. Please contact {SUPPORT_EMAIL}.")
+elif job and not st.session_state.zips and _pack_store().get(job["id"]):
+    # already packed (page refresh): reuse the archive on disk
+    st.session_state.zips = [_pack_store().get(job["id"])]
+    st.session_state.cart = job["codes"]
+elif job and not st.session_state.zips:
+    from report import report_context, render_report_async
+    blocks, payload = job["codes"], job["payload"]
+    outputs = jobs.results(job["id"])
+    truncated = [out["code"] for out in outputs if out["truncated"]]
+    if truncated:
+        st.warning(f"Output may be cut short for: {', '.join(truncated)}")
+
+    # ----------------------------------------------------
+    # 14-A  render client-facing PDF
+    # ----------------------------------------------------
+    # rendered in a worker process; the template, stylesheet and fonts are cached there
+    client_report_name = f"EU_AI_Act_Report_{int(time.time())}.pdf"
+    with st.spinner("Rendering client report ..."):
+        client_report_pdf = render_report_async(report_context(payload, blocks)).result()
+
+    # ----------------------------------------------------
+    # 14-B  ZIP everything
+    # ----------------------------------------------------
+    pack_name = f"{job['meta'].get('pack_label', 'Pack')}_{int(time.time())}.zip"
+
+    with _pack_store().writer(job["id"], pack_name) as pack:
+        for out in outputs:
+            pack.add_block(out["code"], out["text"])
+        pack.add_file(client_report_name, client_report_pdf)
+
+    st.session_state.zips = [pack.path]
     st.session_state.cart = blocks
+
+if st.session_state.zips:
     st.success("All blocks packed into **one** zip.  Pay once below, then download.")
 
 # ------------------------------------------------------------------
 #  15.  DOWNLOAD / CRYPTO CHECKOUT
 # ------------------------------------------------------------------
-if st.session_state.get("zips"):
+# checkout clicks rerun only this fragment
+@st.fragment
+def _download():
     st.markdown("---")
     st.markdown("### 📦 Download")
     z = st.session_state.zips[0]
+    if not z.exists():
+        st.warning(f"This pack has expired. Please generate it again or contact {SUPPORT_EMAIL}.")
+        return
 
     if TEST_MODE:
         st.success("🎁 TEST MODE – download is free.")
         st.download_button(
             label=f"⬇️ {z.name}",
-            data=z.read_bytes(),
+            data=_pack_store().reader(z.parent.name, z.name),   # read on click, not per rerun
             file_name=z.name,
             mime="application/zip",
             key="final_zip",
@@ -445,9 +499,7 @@ if st.session_state.get("zips"):
         st.html('<div style="display:flex;gap:8px;align-items:center"><svg xmlns="http://www.w3.org/2000/svg" width="20" height="20" fill="none" stroke="#f7931a" stroke-width="2" viewBox="0 0 24 24"><circle cx="12" cy="12" r="10"/><path d="M12 6v6l4 2"/></svg><svg xmlns="http://www.w3.org/2000/svg" width="20" height="20" fill="none" stroke="#f7931a" stroke-width="2" viewBox="0 0 24 24"><rect x="3" y="3" width="6" height="6" rx="1"/><rect x="15" y="15" width="6" height="6" rx="1"/></svg><small>Crypto checkout (auto fiat conversion)</small></div>')
         if st.button("Create crypto checkout session", type="primary"):
             cart = st.session_state.cart
-            if set(cart) == set(["A00"] + [f"A{j:02d}" for j in range(1, 21)] +
-                                [f"B{j:02d}" for j in range(1, 15)] +
-                                [f"C{j:02d}" for j in range(1, 14)]):
+            if set(cart) == set(BUNDLES["complete"]):
                 url = NOW_LINKS["complete"]
             elif all(c.startswith("A") for c in cart):
                 url = NOW_LINKS["eu_bundle"]
@@ -462,6 +514,9 @@ if st.session_state.get("zips"):
         if st.session_state.checkout_url:
             st.link_button("Pay now with crypto →", st.session_state.checkout_url, type="primary")
 
+if st.session_state.get("zips"):
+    _download()
+
 # ------------------------------------------------------------------
 #  16.  FOOTER - FIXED FOR STREAMLIT SERVING
 # ------------------------------------------------------------------
@@ -470,26 +525,23 @@ st.markdown("---")
 # Create expanders for policy documents instead of external links
 col1, col2, col3 = st.columns(3)
 
-with col1:
-    with st.expander("📄 Terms of Service"):
-        if Path("terms.md").exists():
-            st.markdown(Path("terms.md").read_text())
-        else:
-            st.write("Terms document coming soon.")
-
-with col2:
-    with st.expander("🔒 Privacy Policy"):
-        if Path("privacy.md").exists():
-            st.markdown(Path("privacy.md").read_text())
-        else:
-            st.write("Privacy policy coming soon.")
-
-with col3:
-    with st.expander("🍪 Cookie Policy"):
-        if Path("cookies.md").exists():
-            st.markdown(Path("cookies.md").read_text())
-        else:
-            st.write("Cookie policy coming soon.")
+@st.cache_data(show_spinner=False)
+def _policy(name: str) -> str | None:
+    path = Path(name)
+    return path.read_text() if path.exists() else None
+
+for col, title, name, missing in (
+    (col1, "📄 Terms of Service", "terms.md",   "Terms document coming soon."),
+    (col2, "🔒 Privacy Policy",   "privacy.md", "Privacy policy coming soon."),
+    (col3, "🍪 Cookie Policy",    "cookies.md", "Cookie policy coming soon."),
+):
+    with col:
+        with st.expander(title):
+            text = _policy(name)
+            if text is not None:
+                st.markdown(text)
+            else:
+                st.write(missing)
 
 # Basic footer
 st.markdown(
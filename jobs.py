@@ -0,0 +1,269 @@
+import os, json, time, uuid, socket, sqlite3, pathlib, threading
+from concurrent.futures import ThreadPoolExecutor
+import engine
+from metrics import metrics
+
+##############################################################################
+# DURABLE PACK JOBS
+# Jobs and per-block results live in SQLite; a block's text is committed the
+# moment its LLM call returns, so a page refresh or a server restart never
+# repeats a finished call.  JobQueue() resumes unfinished jobs on start.
+# A block that comes back rate-limited is never stored as done: it goes back
+# to pending and is retried later, and fails after RATE_LIMIT_ATTEMPTS.
+##############################################################################
+DEFAULT_PATH = pathlib.Path.home() / ".cache" / "aiactpack" / "jobs.sqlite"
+OWNER        = f"{socket.gethostname()}:{os.getpid()}"
+RATE_LIMIT_ATTEMPTS = int(os.getenv("AIACTPACK_JOB_RATE_LIMIT_ATTEMPTS", "4"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, codes TEXT, payload TEXT, meta TEXT,
+    status TEXT, error TEXT, created REAL, updated REAL);
+CREATE TABLE IF NOT EXISTS blocks (
+    job_id TEXT, code TEXT, idx INTEGER, status TEXT, owner TEXT,
+    text TEXT, finish_reason TEXT, updated REAL,
+    PRIMARY KEY (job_id, code));
+"""
+
+
+def _alive(owner: str | None) -> bool:
+    host, _, pid = (owner or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    def __init__(self, db_path: str | pathlib.Path = DEFAULT_PATH,
+                 workers: int = engine.MAX_CONCURRENCY, resume: bool = True):
+        self.db_path = pathlib.Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="aiactpack-job")
+        self._partial: dict[tuple[str, str], str] = {}
+        self._metrics: dict[str, list[dict]] = {}
+        self._speculative: dict[tuple[str, str], object] = {}
+        self._rate_limited: dict[tuple[str, str], int] = {}
+        if resume:
+            self.resume()
+
+    def _sql(self, query: str, args=()):
+        with self._lock:
+            return self._db.execute(query, args).fetchall()
+
+    # -- submit / resume ------------------------------------------------------
+    def submit(self, codes: list[str], payload: dict, meta: dict | None = None,
+               speculative: dict | None = None) -> str:
+        # speculative: {code: Future of engine.generate_block} started before submit
+        job_id = uuid.uuid4().hex
+        for code, fut in (speculative or {}).items():
+            self._speculative[(job_id, code)] = fut
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, 'running', NULL, ?, ?)",
+                             (job_id, json.dumps(codes), json.dumps(payload, default=str),
+                              json.dumps(meta or {}), now, now))
+            self._db.executemany("INSERT INTO blocks VALUES (?, ?, ?, 'pending', NULL, NULL, NULL, ?)",
+                                 [(job_id, code, i, now) for i, code in enumerate(codes)])
+            self._db.execute("COMMIT")
+        self._schedule(job_id, codes, payload)
+        return job_id
+
+    def regenerate(self, job_id: str, payload: dict) -> tuple[str, list[str]]:
+        # new version of a completed job: only blocks whose prompt uses a changed
+        # field are re-run, the rest are copied from the previous version
+        prev = self.job(job_id)
+        codes = prev["codes"]
+        rerun = set(engine.affected_codes(codes, prev["payload"], payload))
+        # truncated and rate-limited blocks are never carried forward: an edit should fix them
+        old = {out["code"]: out for out in self.results(job_id)
+               if out["status"] == "done" and out["finish_reason"] not in ("length", "rate_limit")}
+        meta = dict(prev["meta"], parent=job_id, version=prev["meta"].get("version", 1) + 1)
+        new_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, 'running', NULL, ?, ?)",
+                             (new_id, json.dumps(codes), json.dumps(payload, default=str),
+                              json.dumps(meta), now, now))
+            self._db.executemany(
+                "INSERT INTO blocks VALUES (?, ?, ?, ?, NULL, ?, ?, ?)",
+                [(new_id, code, i, "pending", None, None, now) if code in rerun or code not in old
+                 else (new_id, code, i, "done", old[code]["text"], old[code]["finish_reason"], now)
+                 for i, code in enumerate(codes)])
+            self._db.execute("COMMIT")
+        pending = [c for c in codes if c in rerun or c not in old]
+        self._schedule(new_id, pending, payload)
+        if not pending:
+            self._finish(new_id)
+        return new_id, pending
+
+    def resume(self) -> list[str]:
+        resumed = []
+        for (job_id,) in self._sql("SELECT id FROM jobs WHERE status = 'running'"):
+            for code, owner in self._sql("SELECT code, owner FROM blocks "
+                                         "WHERE job_id = ? AND status = 'running'", (job_id,)):
+                if owner == OWNER or not _alive(owner):
+                    self._sql("UPDATE blocks SET status = 'pending', owner = NULL "
+                              "WHERE job_id = ? AND code = ? AND status = 'running'", (job_id, code))
+            pending = [c for (c,) in self._sql("SELECT code FROM blocks WHERE job_id = ? "
+                                               "AND status = 'pending' ORDER BY idx", (job_id,))]
+            if pending:
+                self._schedule(job_id, pending, self.job(job_id)["payload"])
+                resumed.append(job_id)
+            else:
+                self._finish(job_id)
+        return resumed
+
+    def _schedule(self, job_id: str, codes: list[str], payload: dict):
+        # with AIACTPACK_GROUP_SIZE > 1 related codes share one request (engine.generate_group)
+        for group in engine.group_codes(codes):
+            if len(group) > 1:
+                self._pool.submit(self._run_group, job_id, group, payload, time.time())
+            else:
+                self._pool.submit(self._run_block, job_id, group[0], payload, time.time())
+
+    # -- worker ---------------------------------------------------------------
+    def _claim(self, job_id: str, code: str) -> bool:
+        with self._lock:
+            cur = self._db.execute("UPDATE blocks SET status = 'running', owner = ?, updated = ? "
+                                   "WHERE job_id = ? AND code = ? AND status = 'pending'",
+                                   (OWNER, time.time(), job_id, code))
+            return cur.rowcount == 1
+
+    def _run_block(self, job_id: str, code: str, payload: dict, queued_at: float):
+        if not self._claim(job_id, code):
+            return
+        key = (job_id, code)
+        self._partial[key] = ""
+
+        def _on_chunk(c: str, piece: str):
+            self._partial[key] += piece
+
+        try:
+            out = self._speculated(key)
+            if out is None:
+                out = engine.generate_block(code, payload, on_chunk=_on_chunk, queued_at=queued_at)
+            self._store(job_id, code, payload, out)
+        except Exception as e:
+            self._fail(job_id, code, e)
+        finally:
+            self._partial.pop(key, None)
+        self._finish(job_id)
+
+    def _run_group(self, job_id: str, codes: list[str], payload: dict, queued_at: float):
+        codes = [code for code in codes if self._claim(job_id, code)]
+        # blocks started speculatively are not asked for again
+        todo = []
+        for code in codes:
+            out = self._speculated((job_id, code))
+            if out is None:
+                todo.append(code)
+            else:
+                self._store(job_id, code, payload, out)
+        try:
+            outs = engine.generate_group(todo, payload, queued_at=queued_at) if todo else []
+            for out in outs:
+                self._store(job_id, out["code"], payload, out)
+        except Exception as e:
+            for code in todo:
+                self._fail(job_id, code, e)
+        self._finish(job_id)
+
+    def _store(self, job_id: str, code: str, payload: dict, out: dict):
+        self._metrics.setdefault(job_id, []).append(out["metrics"])
+        if out["finish_reason"] == "rate_limit":
+            self._rate_limit(job_id, code, payload)
+            return
+        self._rate_limited.pop((job_id, code), None)
+        self._sql("UPDATE blocks SET status = 'done', text = ?, finish_reason = ?, updated = ? "
+                  "WHERE job_id = ? AND code = ?",
+                  (out["text"], out["finish_reason"], time.time(), job_id, code))
+
+    def _fail(self, job_id: str, code: str, error: Exception):
+        self._sql("UPDATE blocks SET status = 'failed', text = ?, updated = ? "
+                  "WHERE job_id = ? AND code = ? AND status = 'running'",
+                  (repr(error), time.time(), job_id, code))
+
+    def _rate_limit(self, job_id: str, code: str, payload: dict):
+        # the placeholder is not a result: back to pending and retry after a
+        # growing pause, or fail the block once the attempts are used up
+        key = (job_id, code)
+        attempt = self._rate_limited.get(key, 0) + 1
+        if attempt >= RATE_LIMIT_ATTEMPTS:
+            self._rate_limited.pop(key, None)
+            self._sql("UPDATE blocks SET status = 'failed', text = ?, finish_reason = 'rate_limit', updated = ? "
+                      "WHERE job_id = ? AND code = ?",
+                      (f"rate-limited after {attempt} attempts", time.time(), job_id, code))
+            self._finish(job_id)
+            return
+        self._rate_limited[key] = attempt
+        self._sql("UPDATE blocks SET status = 'pending', owner = NULL, updated = ? "
+                  "WHERE job_id = ? AND code = ?", (time.time(), job_id, code))
+        timer = threading.Timer(engine.RATE_LIMIT_PAUSE * attempt, self._schedule, (job_id, [code], payload))
+        timer.daemon = True
+        timer.start()
+
+    def _speculated(self, key: tuple[str, str]) -> dict | None:
+        fut = self._speculative.pop(key, None)
+        if fut is None:
+            return None
+        try:
+            out = fut.result()
+        except Exception:
+            return None             # generate it normally
+        if out["finish_reason"] == "rate_limit":
+            return None
+        out["metrics"]["speculative"] = True
+        return out
+
+    def _finish(self, job_id: str):
+        counts = dict(self._sql("SELECT status, COUNT(*) FROM blocks WHERE job_id = ? GROUP BY status",
+                                (job_id,)))
+        if counts.get("pending") or counts.get("running"):
+            return
+        status = "failed" if counts.get("failed") else "completed"
+        with self._lock:
+            finished = self._db.execute("UPDATE jobs SET status = ?, updated = ? "
+                                        "WHERE id = ? AND status = 'running'",
+                                        (status, time.time(), job_id)).rowcount
+        if finished:
+            metrics.log_pack(job_id, self._metrics.pop(job_id, []), status=status)
+
+    # -- polling --------------------------------------------------------------
+    def job(self, job_id: str) -> dict | None:
+        rows = self._sql("SELECT codes, payload, meta, status FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        codes, payload, meta, status = rows[0]
+        return {"id": job_id, "codes": json.loads(codes), "payload": json.loads(payload),
+                "meta": json.loads(meta), "status": status}
+
+    def status(self, job_id: str) -> dict | None:
+        job = self.job(job_id)
+        if job is None:
+            return None
+        blocks = dict(self._sql("SELECT code, status FROM blocks WHERE job_id = ?", (job_id,)))
+        return {"status": job["status"], "total": len(blocks),
+                "done": sum(s in ("done", "failed") for s in blocks.values()), "blocks": blocks}
+
+    def partial(self, job_id: str) -> dict[str, str]:
+        # live text of blocks currently streaming in this process
+        return {code: text for (jid, code), text in list(self._partial.items()) if jid == job_id}
+
+    def results(self, job_id: str) -> list[dict]:
+        rows = self._sql("SELECT code, status, text, finish_reason FROM blocks "
+                         "WHERE job_id = ? ORDER BY idx", (job_id,))
+        return [{"code": code, "status": status, "text": text or "", "finish_reason": finish_reason,
+                 "truncated": finish_reason == "length"} for code, status, text, finish_reason in rows]
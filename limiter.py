@@ -0,0 +1,147 @@
+import re, time, random, sqlite3, threading
+
+##############################################################################
+# SHARED RPM / TPM TOKEN BUCKET
+# One instance per process; pass db_path to share the bucket between worker
+# processes (state lives in one SQLite row, updated under BEGIN IMMEDIATE).
+##############################################################################
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS    = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value) -> float | None:
+    """'1s', '6m0s', '20ms', '12' -> seconds"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _UNITS[u] for n, u in parts)
+
+
+def retry_after(headers) -> float | None:
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms is not None:
+        try:
+            return float(ms) / 1000
+        except ValueError:
+            pass
+    return parse_duration(headers.get("retry-after"))
+
+
+def jitter_backoff(attempt: int, base: float, cap: float = 60.0) -> float:
+    return random.uniform(0.5, 1.0) * min(cap, base * attempt)
+
+
+class RateLimiter:
+    def __init__(self, rpm: int, tpm: int, db_path: str | None = None):
+        self.rpm, self.tpm = max(1, rpm), max(1, tpm)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._state = {"req": float(self.rpm), "tok": float(self.tpm),
+                       "ts": time.time(), "blocked": 0.0}
+        if db_path:
+            with sqlite3.connect(db_path, timeout=30) as db:
+                db.execute("CREATE TABLE IF NOT EXISTS bucket "
+                           "(id INTEGER PRIMARY KEY, req REAL, tok REAL, ts REAL, blocked REAL)")
+                db.execute("INSERT OR IGNORE INTO bucket VALUES (1, ?, ?, ?, 0)",
+                           (self.rpm, self.tpm, time.time()))
+
+    # -- state access ---------------------------------------------------------
+    def _transact(self, fn):
+        with self._lock:
+            if not self.db_path:
+                return fn(self._state)
+            db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            try:
+                db.execute("BEGIN IMMEDIATE")
+                req, tok, ts, blocked = db.execute(
+                    "SELECT req, tok, ts, blocked FROM bucket WHERE id = 1").fetchone()
+                state = {"req": req, "tok": tok, "ts": ts, "blocked": blocked}
+                out = fn(state)
+                db.execute("UPDATE bucket SET req = ?, tok = ?, ts = ?, blocked = ? WHERE id = 1",
+                           (state["req"], state["tok"], state["ts"], state["blocked"]))
+                db.execute("COMMIT")
+                return out
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            finally:
+                db.close()
+
+    def _refill(self, state: dict, now: float):
+        elapsed = max(0.0, now - state["ts"])
+        state["req"] = min(self.rpm, state["req"] + elapsed * self.rpm / 60)
+        state["tok"] = min(self.tpm, state["tok"] + elapsed * self.tpm / 60)
+        state["ts"] = now
+
+    # -- public API -----------------------------------------------------------
+    def acquire(self, tokens: int) -> float:
+        """Block until one request + `tokens` fit the budget; returns seconds waited."""
+        tokens = min(max(0, tokens), self.tpm)
+        waited = 0.0
+
+        def take(state):
+            now = time.time()
+            self._refill(state, now)
+            if now < state["blocked"]:
+                return state["blocked"] - now
+            if state["req"] >= 1 and state["tok"] >= tokens:
+                state["req"] -= 1
+                state["tok"] -= tokens
+                return 0.0
+            return max((1 - state["req"]) * 60 / self.rpm,
+                       (tokens - state["tok"]) * 60 / self.tpm)
+
+        while True:
+            wait = self._transact(take)
+            if wait <= 0:
+                return waited
+            wait += random.uniform(0, min(1.0, wait * 0.1))
+            time.sleep(wait)
+            waited += wait
+
+    def refund(self, tokens: int):
+        """Give back reserved tokens that the response did not use."""
+        if tokens <= 0:
+            return
+
+        def give(state):
+            self._refill(state, time.time())
+            state["tok"] = min(self.tpm, state["tok"] + tokens)
+        self._transact(give)
+
+    def pause(self, seconds: float):
+        """Hold every caller (in every process sharing the bucket) for `seconds`."""
+        def block(state):
+            state["blocked"] = max(state["blocked"], time.time() + seconds)
+        self._transact(block)
+
+    def observe(self, headers):
+        """Align the local bucket with the server's x-ratelimit-* view."""
+        if not headers:
+            return
+        rem_req = headers.get("x-ratelimit-remaining-requests")
+        rem_tok = headers.get("x-ratelimit-remaining-tokens")
+        reset_req = parse_duration(headers.get("x-ratelimit-reset-requests"))
+        reset_tok = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+
+        def sync(state):
+            now = time.time()
+            self._refill(state, now)
+            if rem_req is not None and rem_req.isdigit():
+                state["req"] = min(state["req"], float(rem_req))
+                if int(rem_req) == 0 and reset_req:
+                    state["blocked"] = max(state["blocked"], now + reset_req)
+            if rem_tok is not None and rem_tok.isdigit():
+                state["tok"] = min(state["tok"], float(rem_tok))
+                if int(rem_tok) == 0 and reset_tok:
+                    state["blocked"] = max(state["blocked"], now + reset_tok)
+        self._transact(sync)
@@ -0,0 +1,322 @@
+import os, sys, json, time, types, shutil, zipfile, argparse, resource, statistics, subprocess, tempfile, threading
+
+##############################################################################
+# MULTI-SESSION LOAD TEST  (streamlit.testing AppTest + local FakeOpenAI)
+#   python loadtest.py --sessions 1,5,10,20 --bundle complete --latency 0.8
+# Every session count runs in a fresh child process that stands for one
+# server: N sessions fill the wizard, submit, wait for their pack and read the
+# ZIP, sharing one JobQueue, limiter and pack store.  AppTest's runtime is a
+# process-wide singleton, so script runs are serialised; job workers, LLM
+# calls and PDF rendering still run concurrently.  Reports per-session
+# latency, peak RSS (process + children), open FDs and temp-disk growth, and
+# turns them into a capacity estimate.
+##############################################################################
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "home.py")
+BUNDLE_LABELS = {"eu": "EU AI-Act", "nist": "NIST AI RMF", "iso": "ISO 42001"}
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid: int) -> list[int]:
+    out = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as fh:
+                    if int(fh.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        out.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                pass
+    return out
+
+
+def rss_tree() -> int:
+    # this process and its direct children (PDF workers); ru_maxrss without /proc
+    if not os.path.exists("/proc/self/status"):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    pid = os.getpid()
+    return _rss_bytes(pid) + sum(_rss_bytes(c) for c in _children(pid))
+
+
+def open_fds() -> int:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+def disk_usage(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class Sampler:
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.peak_rss = self.peak_fds = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_rss = max(self.peak_rss, rss_tree())
+            self.peak_fds = max(self.peak_fds, open_fds())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_rss = max(self.peak_rss, rss_tree())
+        self.peak_fds = max(self.peak_fds, open_fds())
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))]
+
+
+##############################################################################
+# ONE LEVEL  (child process)
+##############################################################################
+_run_lock = threading.Lock()
+
+
+def _run(at, timings: dict):
+    t0 = time.perf_counter()
+    with _run_lock:
+        t1 = time.perf_counter()
+        at.run()
+    timings["lock_wait_s"] += t1 - t0
+    timings["script_s"] += time.perf_counter() - t1
+
+
+def _submit(at, timings: dict):
+    next(b for b in at.button if b.label.startswith("Generate")).click()
+    _run(at, timings)
+
+
+def session(i: int, bundle: str, timeout: float) -> dict:
+    from streamlit.testing.v1 import AppTest
+    timings = {"lock_wait_s": 0.0, "script_s": 0.0}
+    started = time.perf_counter()
+    try:
+        at = AppTest.from_file(APP, default_timeout=120)
+        at.query_params["test"] = "1"
+        _run(at, timings)
+        mode = at.radio[0]
+        if bundle == "complete":
+            mode.set_value(next(o for o in mode.options if o.startswith("Complete")))
+        else:
+            # the production form only reruns on submit: a first submit (mandatory
+            # fields still empty, so nothing is queued) renders the bundle choice
+            mode.set_value("Individual bundle")
+            _submit(at, timings)
+            choice = next(r for r in at.radio if any(BUNDLE_LABELS[bundle] in o for o in r.options))
+            choice.set_value(next(o for o in choice.options if BUNDLE_LABELS[bundle] in o))
+        for t in at.text_input:
+            if "trade name" in t.label:
+                t.input(f"LoadModel-{i}")
+        at.text_area[0].input(f"internal-{i}.csv")
+        submit_at = time.perf_counter()
+        _submit(at, timings)
+        while not at.session_state.zips:
+            if at.exception or time.perf_counter() - submit_at > timeout:
+                raise RuntimeError(at.exception[0].value if at.exception else "timed out waiting for the pack")
+            time.sleep(0.25)
+            _run(at, timings)
+        ready_at = time.perf_counter()
+        # what the deferred download button reads on click
+        path = at.session_state.zips[0]
+        with zipfile.ZipFile(path) as zf:
+            names = zf.namelist()
+            size = sum(len(zf.read(n)) for n in names)
+        return {"session": i, "ok": True, "submit_to_pack_s": round(ready_at - submit_at, 3),
+                "total_s": round(time.perf_counter() - started, 3), "files": len(names),
+                "unzipped_bytes": size, **{k: round(v, 3) for k, v in timings.items()}}
+    except Exception as e:
+        return {"session": i, "ok": False, "error": repr(e), "total_s": round(time.perf_counter() - started, 3)}
+
+
+def run_level(args) -> dict:
+    # environment is set up by the parent; the app and engine are imported here
+    if args.stub_pdf:
+        # WeasyPrint/pango not installed: PDF cost is left out of the measurement
+        from concurrent.futures import Future
+        stub = types.ModuleType("report")
+        stub.report_context = lambda payload, codes: {}
+
+        def _render(ctx):
+            fut = Future()
+            fut.set_result(b"%PDF-1.4 load-test placeholder")
+            return fut
+        stub.render_report_async = _render
+        sys.modules["report"] = stub
+    from fake_openai import FakeOpenAI
+    fake = FakeOpenAI(latency=args.latency, jitter=args.jitter, completion_tokens=args.tokens,
+                      rate_429=args.rate_429, seed=args.seed).start()
+    os.environ["AIACTPACK_BASE_URL"] = fake.base_url
+    workdir = os.environ["AIACTPACK_LOADTEST_DIR"]
+    os.chdir(os.path.dirname(APP))
+    # module imports are paid once per server, not per session: keep them out of the baseline
+    from streamlit.testing.v1 import AppTest
+    import engine, jobs, pack
+
+    baseline_rss, baseline_fds, baseline_disk = rss_tree(), open_fds(), disk_usage(workdir)
+    results: list[dict] = [None] * args.level
+    started = time.perf_counter()
+    with Sampler() as sampler:
+        threads = []
+        for i in range(args.level):
+            t = threading.Thread(target=lambda i=i: results.__setitem__(i, session(i, args.bundle, args.timeout)))
+            threads.append(t)
+            t.start()
+            time.sleep(args.ramp)
+        for t in threads:
+            t.join()
+    wall = time.perf_counter() - started
+    fake.stop()
+
+    from metrics import metrics
+    snap = metrics.snapshot()["blocks"]
+    ok = [r for r in results if r["ok"]]
+    latency = [r["submit_to_pack_s"] for r in ok]
+    tokens = sum(v["prompt_tokens"] + v["completion_tokens"] for v in snap.values())
+    return {
+        "sessions": args.level,
+        "ok": len(ok),
+        "failed": len(results) - len(ok),
+        "errors": sorted({r["error"] for r in results if not r["ok"]}),
+        "wall_s": round(wall, 2),
+        "submit_to_pack_p50_s": percentile(latency, 0.50),
+        "submit_to_pack_p95_s": percentile(latency, 0.95),
+        "submit_to_pack_max_s": max(latency, default=None),
+        "script_s_mean": round(statistics.mean(r["script_s"] for r in ok), 3) if ok else None,
+        "baseline_rss_mb": round(baseline_rss / 2**20, 1),
+        "peak_rss_mb": round(sampler.peak_rss / 2**20, 1),
+        "rss_per_session_mb": round((sampler.peak_rss - baseline_rss) / 2**20 / args.level, 2),
+        "baseline_fds": baseline_fds,
+        "peak_fds": sampler.peak_fds,
+        "disk_growth_mb": round((disk_usage(workdir) - baseline_disk) / 2**20, 2),
+        "llm_requests": fake.stats["requests"],
+        "rate_limited": fake.stats["rate_limited"],
+        "tokens": tokens,
+        "tokens_per_pack": round(tokens / len(ok)) if ok else None,
+        "rate_limit_sleep_s": round(sum(v["rate_limit_sleep_s"] for v in snap.values()), 2),
+        "per_session": results,
+    }
+
+
+##############################################################################
+# CAPACITY REPORT  (parent)
+##############################################################################
+def _mem_total() -> int | None:
+    try:
+        with open("/proc/meminfo") as fh:
+            for line in fh:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+
+def _child(level: int, args) -> dict:
+    workdir = tempfile.mkdtemp(prefix="aiactpack_loadtest_")
+    tmp = os.path.join(workdir, "tmp")
+    os.makedirs(tmp)
+    env = dict(os.environ, OPENAI_KEY=os.getenv("OPENAI_KEY", "loadtest"), TMPDIR=tmp,
+               AIACTPACK_LOADTEST_DIR=workdir, AIACTPACK_CACHE_DB="",
+               AIACTPACK_JOBS_DB=os.path.join(workdir, "jobs.sqlite"),
+               AIACTPACK_PACKS_DIR=os.path.join(workdir, "packs"),
+               OPENAI_RPM=str(args.rpm), OPENAI_TPM=str(args.tpm))
+    # the page production serves: form wizard, no speculation
+    env.pop("AIACTPACK_SPECULATE", None)
+    cmd = [sys.executable, os.path.abspath(__file__), "--level", str(level)] + sys.argv[1:]
+    try:
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+    if out.returncode or not lines:
+        return {"sessions": level, "ok": 0, "failed": level, "errors": [out.stderr.strip()[-2000:]]}
+    return json.loads(lines[-1])
+
+
+def capacity(levels: list[dict], args) -> dict:
+    usable = [l for l in levels if l.get("ok")]
+    if not usable:
+        return {}
+    top = max(usable, key=lambda l: l["sessions"])
+    memory = args.memory_mb * 2**20 if args.memory_mb else _mem_total()
+    per_session = max(top["rss_per_session_mb"], 0.01) * 2**20
+    return {
+        "memory_budget_mb": round(memory / 2**20) if memory else None,
+        "max_sessions_by_memory": int((memory - top["baseline_rss_mb"] * 2**20) // per_session) if memory else None,
+        "max_packs_per_min_by_tpm": round(args.tpm / top["tokens_per_pack"], 1) if top["tokens_per_pack"] else None,
+        "max_packs_per_min_by_rpm": round(args.rpm / (top["llm_requests"] / top["ok"]), 1),
+        "disk_per_pack_mb": round(top["disk_growth_mb"] / top["ok"], 3),
+        "p95_latency_at_max_s": top["submit_to_pack_p95_s"],
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Drive N concurrent home.py sessions and report capacity")
+    ap.add_argument("--sessions", default="1,5,10", help="comma-separated session counts")
+    ap.add_argument("--bundle", default="complete", choices=["complete", *BUNDLE_LABELS])
+    ap.add_argument("--latency", type=float, default=0.5, help="mean completion latency (s)")
+    ap.add_argument("--jitter", type=float, default=0.1)
+    ap.add_argument("--tokens", type=int, default=300, help="completion tokens per block")
+    ap.add_argument("--rate-429", type=float, default=0.0)
+    ap.add_argument("--rpm", type=int, default=3500, help="account requests/min for the shared limiter")
+    ap.add_argument("--tpm", type=int, default=160_000, help="account tokens/min for the shared limiter")
+    ap.add_argument("--ramp", type=float, default=0.0, help="seconds between session starts")
+    ap.add_argument("--timeout", type=float, default=600, help="per-session limit for the pack (s)")
+    ap.add_argument("--memory-mb", type=int, help="memory budget for the estimate (default: MemTotal)")
+    ap.add_argument("--stub-pdf", action="store_true", help="skip WeasyPrint (PDF cost not measured)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--output", help="also write the JSON report to this file")
+    ap.add_argument("--level", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.level:
+        print(json.dumps(run_level(args)))
+        sys.exit(0)
+
+    levels = []
+    for n in (int(x) for x in args.sessions.split(",")):
+        level = _child(n, args)
+        levels.append(level)
+        print(f"{n:>4} sessions: ok={level.get('ok')} p95={level.get('submit_to_pack_p95_s')}s "
+              f"peak_rss={level.get('peak_rss_mb')}MB fds={level.get('peak_fds')} "
+              f"disk+={level.get('disk_growth_mb')}MB", file=sys.stderr)
+    report = json.dumps({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "config": {k: v for k, v in vars(args).items() if k != "level"},
+        "levels": levels,
+        "capacity": capacity(levels, args),
+    }, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(report)
@@ -0,0 +1,164 @@
+import json, logging, threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+##############################################################################
+# PER-BLOCK METRICS
+# engine.generate_block records one dict per block; this module aggregates
+# them per prompt code and exports Prometheus text or JSON, and writes one
+# structured log line per pack.
+##############################################################################
+log = logging.getLogger("aiactpack")
+
+FIELDS = ("wall_s", "queue_wait_s", "retries", "rate_limit_sleep_s",
+          "prompt_tokens", "completion_tokens", "continuations", "output_bytes")
+# per-code counters of blocks with the flag set
+COUNTS = ("count", "cached", "hedged", "fast_path", "semantic_lookups", "semantic_hits")
+
+
+def new_stats() -> dict:
+    # filled in by engine.complete()
+    return {"retries": 0, "rate_limit_sleep_s": 0.0, "prompt_tokens": 0,
+            "completion_tokens": 0, "continuations": 0, "cached": False, "hedged": False, "fast_path": False,
+            "semantic_lookup": False, "semantic_hit": False, "backend": None}
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.blocks = defaultdict(lambda: dict.fromkeys(FIELDS + COUNTS, 0))
+            self.finish = defaultdict(int)
+            # multi-block requests, per group size
+            self.groups = defaultdict(lambda: dict.fromkeys(FIELDS + ("requests", "blocks"), 0))
+            self.packs = 0
+
+    def record(self, rec: dict):
+        with self._lock:
+            agg = self.blocks[rec["code"]]
+            agg["count"] += 1
+            agg["cached"] += bool(rec.get("cached"))
+            agg["hedged"] += bool(rec.get("hedged"))
+            agg["fast_path"] += bool(rec.get("fast_path"))
+            agg["semantic_lookups"] += bool(rec.get("semantic_lookup"))
+            agg["semantic_hits"] += bool(rec.get("semantic_hit"))
+            for f in FIELDS:
+                agg[f] += rec.get(f) or 0
+            self.finish[rec.get("finish_reason") or "unknown"] += 1
+
+    def record_group(self, rec: dict):
+        # one engine.generate_group request; its blocks are recorded per code
+        with self._lock:
+            agg = self.groups[str(len(rec["codes"]))]
+            agg["requests"] += 1
+            agg["blocks"] += len(rec["codes"])
+            for f in FIELDS:
+                agg[f] += rec.get(f) or 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"blocks": {code: dict(v) for code, v in sorted(self.blocks.items())},
+                    "groups": {size: dict(v) for size, v in sorted(self.groups.items())},
+                    "finish_reason": dict(self.finish), "packs": self.packs}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = []
+        names = {"wall_s": ("aiactpack_block_wall_seconds", "summary"),
+                 "queue_wait_s": ("aiactpack_block_queue_wait_seconds", "summary"),
+                 "rate_limit_sleep_s": ("aiactpack_rate_limit_sleep_seconds_total", "counter"),
+                 "retries": ("aiactpack_block_retries_total", "counter"),
+                 "prompt_tokens": ("aiactpack_prompt_tokens_total", "counter"),
+                 "completion_tokens": ("aiactpack_completion_tokens_total", "counter"),
+                 "continuations": ("aiactpack_block_continuations_total", "counter"),
+                 "output_bytes": ("aiactpack_output_bytes_total", "counter")}
+        for field, (name, kind) in names.items():
+            lines.append(f"# TYPE {name} {kind}")
+            for code, agg in snap["blocks"].items():
+                if kind == "summary":
+                    lines.append(f'{name}_sum{{code="{code}"}} {agg[field]:.6f}')
+                    lines.append(f'{name}_count{{code="{code}"}} {agg["count"]}')
+                else:
+                    lines.append(f'{name}{{code="{code}"}} {agg[field]}')
+        lines.append("# TYPE aiactpack_block_cache_hits_total counter")
+        for code, agg in snap["blocks"].items():
+            lines.append(f'aiactpack_block_cache_hits_total{{code="{code}"}} {agg["cached"]}')
+        lines.append("# TYPE aiactpack_block_hedged_total counter")
+        for code, agg in snap["blocks"].items():
+            lines.append(f'aiactpack_block_hedged_total{{code="{code}"}} {agg["hedged"]}')
+        lines.append("# TYPE aiactpack_block_fast_path_total counter")
+        for code, agg in snap["blocks"].items():
+            lines.append(f'aiactpack_block_fast_path_total{{code="{code}"}} {agg["fast_path"]}')
+        for name, field in (("aiactpack_semantic_lookups_total", "semantic_lookups"),
+                            ("aiactpack_semantic_hits_total", "semantic_hits")):
+            lines.append(f"# TYPE {name} counter")
+            for code, agg in snap["blocks"].items():
+                lines.append(f'{name}{{code="{code}"}} {agg[field]}')
+        for name, field in (("aiactpack_group_requests_total", "requests"),
+                            ("aiactpack_group_blocks_total", "blocks"),
+                            ("aiactpack_group_wall_seconds_total", "wall_s"),
+                            ("aiactpack_group_retries_total", "retries"),
+                            ("aiactpack_group_prompt_tokens_total", "prompt_tokens"),
+                            ("aiactpack_group_completion_tokens_total", "completion_tokens")):
+            lines.append(f"# TYPE {name} counter")
+            for size, agg in snap["groups"].items():
+                lines.append(f'{name}{{size="{size}"}} {agg[field]}')
+        lines.append("# TYPE aiactpack_finish_reason_total counter")
+        for reason, n in snap["finish_reason"].items():
+            lines.append(f'aiactpack_finish_reason_total{{reason="{reason}"}} {n}')
+        lines.append("# TYPE aiactpack_packs_total counter")
+        lines.append(f"aiactpack_packs_total {snap['packs']}")
+        return "\n".join(lines) + "\n"
+
+    def log_pack(self, pack_id: str, records: list[dict], **extra):
+        # one structured line per finished pack
+        with self._lock:
+            self.packs += 1
+        summary = {"event": "pack_done", "pack_id": pack_id, "blocks": len(records)}
+        for f in FIELDS:
+            summary[f] = round(sum(r.get(f) or 0 for r in records), 4)
+        summary["wall_max_s"] = round(max((r.get("wall_s") or 0 for r in records), default=0), 4)
+        summary["cached"] = sum(bool(r.get("cached")) for r in records)
+        summary["hedged"] = sum(bool(r.get("hedged")) for r in records)
+        summary["fast_path"] = sum(bool(r.get("fast_path")) for r in records)
+        summary["semantic_hits"] = sum(bool(r.get("semantic_hit")) for r in records)
+        summary["truncated"] = [r["code"] for r in records if r.get("finish_reason") == "length"]
+        summary.update(extra)
+        log.info(json.dumps(summary))
+        return summary
+
+
+metrics = Metrics()
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    # GET /metrics -> Prometheus text, GET /metrics.json -> JSON
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, ctype = metrics.to_json(), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, ctype = metrics.to_prometheus(), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("content-type", ctype)
+            self.send_header("content-length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
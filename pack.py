@@ -0,0 +1,117 @@
+import os, time, shutil, pathlib, tempfile, threading, zipfile
+
+##############################################################################
+# SINGLE-PASS PACK WRITER
+# Blocks are written into the final archive with writestr as they arrive;
+# already-compressed files (the PDF) are stored, not deflated.  The archive
+# is built next to its final path and renamed into place on close.
+##############################################################################
+PACKS_DIR = pathlib.Path(os.getenv("AIACTPACK_PACKS_DIR",
+                                   pathlib.Path(tempfile.gettempdir()) / "aiactpack_packs"))
+PACKS_QUOTA_MB = int(os.getenv("AIACTPACK_PACKS_QUOTA_MB", "2048"))
+PACKS_TTL_H    = float(os.getenv("AIACTPACK_PACKS_TTL_H", "168"))
+# temp dirs made by engine.build_block / build_blocks, left to gc when stale
+TEMP_PREFIXES  = ("aiactpack_block_", "aiactpack_blocks_")
+
+
+class PackWriter:
+    def __init__(self, path: str | pathlib.Path):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._part = self.path.with_name(self.path.name + ".part")
+        self._zf = zipfile.ZipFile(self._part, "w", zipfile.ZIP_DEFLATED)
+
+    def add_block(self, code: str, text: str):
+        self._zf.writestr(f"{code}.md", text, compress_type=zipfile.ZIP_DEFLATED)
+
+    def add_file(self, name: str, data: bytes, compress: bool = False):
+        self._zf.writestr(name, data,
+                          compress_type=zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED)
+
+    def close(self) -> pathlib.Path:
+        self._zf.close()
+        os.replace(self._part, self.path)
+        return self.path
+
+    def abort(self):
+        self._zf.close()
+        self._part.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+##############################################################################
+# PACK STORE
+# <root>/<pack_id>/<name>.zip; a pack's mtime is its last use.  gc() drops
+# packs unused for `ttl` seconds, then the least recently used ones until the
+# store fits in `max_bytes`, plus stale engine block dirs (TEMP_PREFIXES;
+# other aiactpack_* dirs belong to processes this store knows nothing about,
+# e.g. batch roots, bench and load-test work dirs).  Downloads read
+# the file on demand, so nothing is held in memory between reruns.
+##############################################################################
+class PackStore:
+    GC_INTERVAL = 60
+
+    def __init__(self, root: str | pathlib.Path = PACKS_DIR, max_bytes: int = PACKS_QUOTA_MB * 2**20,
+                 ttl: float = PACKS_TTL_H * 3600):
+        self.root = pathlib.Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes, self.ttl = max_bytes, ttl
+        self._lock = threading.Lock()
+        self._last_gc = 0.0
+
+    def writer(self, pack_id: str, name: str) -> PackWriter:
+        self.maybe_gc()
+        return PackWriter(self.root / pack_id / name)
+
+    def get(self, pack_id: str) -> pathlib.Path | None:
+        # newest finished archive of the pack, marked as used
+        files = sorted(self.root.joinpath(pack_id).glob("*.zip"), key=lambda p: p.stat().st_mtime)
+        if not files:
+            return None
+        self.root.joinpath(pack_id).touch()
+        return files[-1]
+
+    def reader(self, pack_id: str, name: str):
+        # zero-argument callable for st.download_button(data=...): the file is
+        # only read when the button is clicked
+        return (self.root / pack_id / name).read_bytes
+
+    def usage(self) -> int:
+        return sum(f.stat().st_size for f in self.root.rglob("*") if f.is_file())
+
+    def maybe_gc(self):
+        if time.time() - self._last_gc >= self.GC_INTERVAL:
+            self.gc()
+
+    def gc(self, now: float | None = None) -> list[str]:
+        now = now or time.time()
+        removed = []
+        with self._lock:
+            self._last_gc = now
+            packs = []
+            for d in self.root.iterdir():
+                if not d.is_dir():
+                    continue
+                size = sum(f.stat().st_size for f in d.rglob("*") if f.is_file())
+                packs.append((d.stat().st_mtime, size, d))
+            packs.sort()
+            total = sum(size for _, size, _ in packs)
+            for used, size, d in packs:
+                if now - used > self.ttl or total > self.max_bytes:
+                    shutil.rmtree(d, ignore_errors=True)
+                    total -= size
+                    removed.append(d.name)
+            tmp = pathlib.Path(tempfile.gettempdir())
+            for d in (d for prefix in TEMP_PREFIXES for d in tmp.glob(f"{prefix}*")):
+                if d.is_dir() and d.resolve() != self.root.resolve() and now - d.stat().st_mtime > self.ttl:
+                    shutil.rmtree(d, ignore_errors=True)
+        return removed
+
@@ -0,0 +1,55 @@
+import os, pathlib, threading
+from jinja2 import Environment, StrictUndefined, meta
+
+##############################################################################
+# PRECOMPILED PROMPT REGISTRY
+# Every prompts/<code>.txt is compiled once; a file is recompiled only when
+# its mtime changes. variables(code) comes from the Jinja AST.
+##############################################################################
+class PromptRegistry:
+    def __init__(self, prompts_dir: pathlib.Path):
+        self.dir = pathlib.Path(prompts_dir)
+        self.env = Environment(undefined=StrictUndefined)
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple] = {}     # code -> (mtime, source, template, variables)
+        for path in sorted(self.dir.glob("*.txt")):
+            self._load(path.stem)
+
+    def _load(self, code: str) -> tuple:
+        path = self.dir / f"{code}.txt"
+        mtime = os.stat(path).st_mtime_ns
+        entry = self._entries.get(code)
+        if entry and entry[0] == mtime:
+            return entry
+        with self._lock:
+            source = path.read_text(encoding="utf-8")
+            variables = frozenset(meta.find_undeclared_variables(self.env.parse(source)))
+            entry = (mtime, source, self.env.from_string(source), variables)
+            self._entries[code] = entry
+        return entry
+
+    def codes(self) -> list[str]:
+        return sorted(self._entries)
+
+    def source(self, code: str) -> str:
+        return self._load(code)[1]
+
+    def variables(self, code: str) -> frozenset[str]:
+        return self._load(code)[3]
+
+    def context(self, code: str, payload: dict) -> dict:
+        # only the fields this prompt references; `ctx` exposes the full payload
+        variables = self.variables(code)
+        ctx = {k: payload[k] for k in variables if k in payload}
+        if "ctx" in variables:
+            ctx["ctx"] = payload
+        return ctx
+
+    def render(self, code: str, payload: dict) -> str:
+        return self._load(code)[2].render(self.context(code, payload))
+
+    def validate(self, fields) -> dict[str, set[str]]:
+        # {code: referenced variables not in `fields`}; empty when all prompts are satisfied
+        known = set(fields) | {"ctx"}
+        return {code: set(self.variables(code)) - known
+                for code in self.codes() if set(self.variables(code)) - known}
@@ -0,0 +1,119 @@
+import os, time, pathlib, statistics, multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+##############################################################################
+# CLIENT PDF REPORT
+# The Jinja env, the parsed stylesheet and the FontConfiguration are built
+# once per process; render_report_async() renders in a process pool so
+# several sessions' PDFs use several cores and never block a script thread.
+##############################################################################
+TEMPLATES_DIR = pathlib.Path(__file__).parent / "templates"
+REPORT_CSS = """
+    @page{size:A4;margin:2cm}
+    body{font-family:Helvetica,sans-serif;font-size:11pt}
+    table{width:100%;border-collapse:collapse}
+    th,td{border:1px solid #ccc;padding:6px}
+    th{background:#f5f5f5}
+"""
+RENDER_WORKERS = int(os.getenv("AIACTPACK_PDF_WORKERS", str(os.cpu_count() or 2)))
+
+_env = Environment(loader=FileSystemLoader(TEMPLATES_DIR),
+                   autoescape=select_autoescape(["html", "xml"]))
+_weasy = None
+_pool = None
+
+
+def _resources():
+    # weasyprint is imported and the stylesheet parsed on first use only
+    global _weasy
+    if _weasy is None:
+        from weasyprint import HTML, CSS
+        from weasyprint.text.fonts import FontConfiguration
+        fonts = FontConfiguration()
+        _weasy = (HTML, CSS(string=REPORT_CSS, font_config=fonts), fonts)
+    return _weasy
+
+
+def report_context(payload: dict, codes: list[str]) -> dict:
+    return {
+        "trade_name": payload["model_name"],
+        "version": "2.1.14",
+        "provider": "Acme FinTech Ltd (IE)",
+        "high_risk_use_case": payload["high_risk"],
+        "deployment": payload["deploy_env"],
+        "n_users": payload["n_users"],
+        "model_family": payload["model_family"],
+        "overall_status": "no critical gaps" if "B05" in codes else "minor gaps",
+        "risk_class": "High-risk (Annex III §6(a))",
+        "evidence_ready": 18,
+        "evidence_total": 20,
+        "effort_days": 6,
+        "gap_6a_status": "✅ Draft fairness report",
+        "transparency_status": "✅ Labelled AI; T&Cs updated",
+        "risk_mgmt_status": "✅",
+        "risk_mgmt_notes": "ISO 31000 aligned, v1.4 signed off",
+        "data_gov_status": "✅",
+        "data_gov_notes": "Training data sheet & bias audit",
+        "tech_doc_status": "✅",
+        "tech_doc_notes": "104-page doc pack under doc-control",
+        "module_b_status": "❌",
+        "module_b_notes": "Draft with NB; awaiting final quote",
+        "module_b_days": 3,
+        "nb_week": 28,
+    }
+
+
+def render_html(context: dict) -> str:
+    return _env.get_template("report_template.html").render(context)
+
+
+def render_report(context: dict) -> bytes:
+    HTML, stylesheet, fonts = _resources()
+    return HTML(string=render_html(context), base_url=str(TEMPLATES_DIR)).write_pdf(
+        stylesheets=[stylesheet], font_config=fonts)
+
+
+def render_report_async(context: dict) -> Future:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max(1, RENDER_WORKERS),
+                                    mp_context=multiprocessing.get_context("spawn"),
+                                    initializer=_resources)
+    return _pool.submit(render_report, context)
+
+
+##############################################################################
+# MICRO-BENCHMARK:  python report.py [runs]
+##############################################################################
+if __name__ == "__main__":
+    import sys, json
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    ctx = report_context({"model_name": "CreditGPT-3", "high_risk": "Credit scoring",
+                          "deploy_env": "AWS", "n_users": 5000, "model_family": "GPT-4"}, ["B05"])
+
+    t0 = time.perf_counter()
+    _resources()
+    cold = time.perf_counter() - t0
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        render_report(ctx)
+        timings.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    futures = [render_report_async(ctx) for _ in range(runs)]
+    for f in futures:
+        f.result()
+    pooled = time.perf_counter() - t0
+
+    timings.sort()
+    print(json.dumps({
+        "runs": runs,
+        "resources_cold_s": round(cold, 4),
+        "render_mean_s": round(statistics.mean(timings), 4),
+        "render_p50_s": round(timings[len(timings) // 2], 4),
+        "render_p95_s": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+        "pool_workers": RENDER_WORKERS,
+        "pool_reports_per_s": round(runs / pooled, 2),
+    }, indent=2))
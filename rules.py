@@ -0,0 +1,138 @@
+import os
+
+##############################################################################
+# DETERMINISTIC FAST PATH
+# Blocks whose content follows from the wizard answers are rendered here,
+# without an LLM call or rate-limit budget.  @renderer("A08") registers a
+# function payload -> markdown; FAST_PATH lists the codes that use it (set
+# AIACTPACK_FAST_PATH="" to send everything to the LLM).  The lead-magnet
+# readiness score (home.py section 12) uses the same rules.
+# Kept free of heavy imports so home.py can load it on every rerun.
+##############################################################################
+RENDERERS: dict[str, callable] = {}
+FAST_PATH = set(filter(None, os.getenv("AIACTPACK_FAST_PATH", "A01,A02,A08").split(",")))
+
+# Annex III area -> wizard high_risk answer that puts the system in it
+ANNEX_III = (
+    ("Biometric identification and categorisation", "Biometric ID"),
+    ("Critical infrastructure (safety components)", None),
+    ("Education and vocational training", None),
+    ("Employment, HR recruitment and worker management", "HR / recruitment"),
+    ("Access to essential services – credit scoring", "Credit scoring"),
+    ("Access to essential services – life/health insurance pricing", "Insurance pricing"),
+    ("Law enforcement", None),
+    ("Migration, asylum and border control", None),
+    ("Administration of justice and democratic processes", None),
+)
+# sectors where an area deserves a second look even if it was not selected
+SECTOR_HINTS = {"HR-tech": "Employment", "FinTech": "credit scoring", "HealthTech": "insurance",
+                "CyberSec": "Biometric", "Auto": "Critical infrastructure"}
+
+
+def renderer(code: str):
+    def register(fn):
+        RENDERERS[code] = fn
+        return fn
+    return register
+
+
+def fast_path(code: str) -> bool:
+    return code in FAST_PATH and code in RENDERERS
+
+
+def render(code: str, payload: dict) -> str:
+    return RENDERERS[code](payload)
+
+
+def _table(header: list[str], rows: list[list[str]]) -> str:
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    lines += ["| " + " | ".join(str(c) for c in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def annex_iii(payload: dict) -> list[tuple[str, str, str]]:
+    # -> [(area, "Y"/"N"/"Review", reason)]
+    hint = SECTOR_HINTS.get(payload.get("sector"))
+    out = []
+    for area, answer in ANNEX_III:
+        if answer and payload.get("high_risk") == answer:
+            out.append((area, "Y", f"Declared use-case: {answer}"))
+        elif hint and hint.lower() in area.lower():
+            out.append((area, "Review", f"Common in {payload['sector']}; confirm it is out of scope"))
+        else:
+            out.append((area, "N", "Not indicated by the wizard answers"))
+    return out
+
+
+def prohibited(payload: dict) -> list[tuple[str, str, str, str]]:
+    # -> [(practice, Y/N, justification, colour)]
+    modal = set(payload.get("data_modal") or [])
+    biometric = payload.get("high_risk") == "Biometric ID"
+    emotion = payload.get("sector") == "HR-tech" and modal & {"Video", "Audio"}
+    return [
+        ("Subliminal / manipulative techniques", "N", "No behavioural-manipulation use declared", "Green"),
+        ("Real-time remote biometric ID in public spaces", "Y" if biometric else "N",
+         "Biometric ID use-case: confirm it is not real-time in public spaces" if biometric
+         else "No biometric use-case declared", "Amber" if biometric else "Green"),
+        ("Social scoring", "N", "No scoring of natural persons' social behaviour declared", "Green"),
+        ("Emotion recognition in the workplace", "Y" if emotion else "N",
+         "HR-tech with audio/video data: confirm no emotion inference" if emotion
+         else "No workplace audio/video processing declared", "Amber" if emotion else "Green"),
+    ]
+
+
+@renderer("A01")
+def _a01(payload: dict) -> str:
+    rows = annex_iii(payload)
+    high = any(flag == "Y" for _, flag, _ in rows)
+    review = any(flag == "Review" for _, flag, _ in rows)
+    confidence = 95 if high or not review else 75
+    return (f"## A01 – Annex III classification: {payload['model_name']}\n\n"
+            + _table(["Annex III area", "In scope (Y/N)", "Basis"], [list(r) for r in rows])
+            + f"\n\n**Overall classification:** {'High-Risk' if high else 'Not High-Risk'} "
+              f"(confidence {confidence} %)\n")
+
+
+@renderer("A02")
+def _a02(payload: dict) -> str:
+    return (f"## A02 – Prohibited practices check (Art. 5): {payload['model_name']}\n\n"
+            + _table(["Practice", "Y/N", "Justification", "Risk"], [list(r) for r in prohibited(payload)])
+            + "\n")
+
+
+@renderer("A08")
+def _a08(payload: dict) -> str:
+    return (f"## A08 – Serious incident reporting (Art. 62): {payload['model_name']}\n\n"
+            + _table(["Incident ID", "Date", "Description", "Severity", "Root cause",
+                      "Corrective action", "Date closed"],
+                     [[f"INC-{i:03d}", "", "", "", "", "", ""] for i in range(1, 4)])
+            + "\n")
+
+
+def readiness_score(payload: dict) -> dict:
+    # 0-100, higher is closer to AI-Act ready; gaps explain every deduction
+    score, gaps = 100, []
+
+    def gap(points: int, why: str):
+        nonlocal score
+        score -= points
+        gaps.append(why)
+
+    if any(flag == "Y" for _, flag, _ in annex_iii(payload)):
+        gap(25, "High-risk system: conformity assessment, QMS and technical file required")
+    elif any(flag == "Review" for _, flag, _ in annex_iii(payload)):
+        gap(10, "Annex III scope needs a documented assessment")
+    for practice, flag, _, _ in prohibited(payload):
+        if flag == "Y":
+            gap(20, f"Possible prohibited practice: {practice}")
+    if payload.get("ce_mark") == "No":
+        gap(15, "No CE marking yet")
+    elif payload.get("ce_mark") == "Partial":
+        gap(8, "CE marking only partial")
+    if payload.get("sandbox") == "No":
+        gap(5, "No regulatory sandbox experience")
+    if not payload.get("data_sources"):
+        gap(10, "Training data sources not documented")
+    score = max(0, score)
+    band = "Ready" if score >= 80 else "Some gaps" if score >= 50 else "Significant gaps"
+    return {"score": score, "band": band, "gaps": gaps}
@@ -0,0 +1,205 @@
+import re, json, math, time, hashlib, sqlite3, pathlib, threading
+
+##############################################################################
+# SEMANTIC NEAR-DUPLICATE CACHE  (opt-in: AIACTPACK_SEMANTIC_DB)
+# A block's answer mostly depends on the wizard fields its prompt references.
+# Those fields (minus the entity fields) are feature-hashed into a sparse,
+# L2-normalised vector; a new request whose vector has cosine similarity
+# >= threshold with a stored one for the same code, template and model
+# reuses that output with the entities (model name, sector) substituted.
+# Free-text fields the model tends to quote verbatim must match exactly, so
+# one customer's data sources never show up in another customer's pack.
+# Counts are embedded by order of magnitude and substituted like entities.
+# A prompt with nothing left to embed (only entities / exact fields) matches
+# any entry of the same scope and exact fields.  A hit whose text would still
+# name the earlier customer's system (see leaks) is served as a miss.
+# Entries are evicted by TTL and then least-recently-used beyond max_entries.
+##############################################################################
+DEFAULT_PATH  = pathlib.Path.home() / ".cache" / "aiactpack" / "semantic.sqlite"
+DIM           = 1 << 18
+ENTITY_FIELDS = ("model_name", "sector")
+EXACT_FIELDS  = ("data_sources",)
+# the entity fields themselves are not embedded, except sector which still
+# matters for the content; it is substituted when a near-match differs
+EMBED_ENTITIES = ("sector",)
+# names of the customer's system: a hit that would still show the earlier
+# customer's one is a miss
+PRIVATE_FIELDS = ("model_name",)
+# embedded as a band (5 000 and 8 000 users are the same answer), substituted in the text
+BANDED_FIELDS = ("n_users",)
+# part of every scope: bump when embed() changes so old vectors are not compared
+VERSION       = 2
+
+
+def band(value) -> str:
+    # order of magnitude: 0, 1-9, 10-99, ... ; non-numbers as they are
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        return str(value).strip().lower()
+    return f"1e{len(str(abs(n))) - 1}" if n else "0"
+
+
+def _tokens(field: str, value) -> list[str]:
+    if field in BANDED_FIELDS:
+        return [f"{field}~{band(value)}"]
+    values = value if isinstance(value, (list, tuple)) else [value]
+    out = []
+    for v in values:
+        v = str(v).strip().lower()
+        out.append(f"{field}={v}")
+        out += [f"{field}:{w}" for w in re.findall(r"[a-z0-9]+", v)]
+    return out
+
+
+def embed(fields: dict) -> dict[int, float]:
+    vec: dict[int, float] = {}
+    for field, value in sorted(fields.items()):
+        for tok in _tokens(field, value):
+            h = int.from_bytes(hashlib.blake2b(tok.encode(), digest_size=8).digest(), "big")
+            i, sign = h % DIM, 1.0 if h >> 63 else -1.0
+            vec[i] = vec.get(i, 0.0) + sign
+    norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+    return {i: v / norm for i, v in vec.items()}
+
+
+def similarity(a: dict[int, float], b: dict[int, float]) -> float:
+    if not a and not b:
+        return 1.0              # nothing to compare beyond scope and exact fields
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(i, 0.0) for i, v in a.items())
+
+
+def _replace(text: str, src: str, dst: str, flags: int = 0) -> str:
+    return re.sub(rf"(?<![\w,.]){re.escape(src)}(?![\w]|[,.]\d)", lambda m: dst, text, flags=flags)
+
+
+def substitute(text: str, old: dict, new: dict) -> str:
+    for field in ENTITY_FIELDS:
+        src, dst = str(old.get(field) or ""), str(new.get(field) or "")
+        if len(src) >= 3 and src != dst:
+            text = _replace(text, src, dst, re.I)
+    for field in BANDED_FIELDS:
+        src, dst = old.get(field), new.get(field)
+        if isinstance(src, int) and isinstance(dst, int) and src != dst and src >= 100:
+            # "5000" and "5,000" both occur in answers
+            text = _replace(_replace(text, f"{src:,}", f"{dst:,}"), str(src), str(dst))
+    return text
+
+
+def leaks(text: str, old: dict, new: dict) -> bool:
+    # True if the earlier customer's name could still be in the substituted text:
+    # too short to replace safely, or still present in some spelling
+    for field in PRIVATE_FIELDS:
+        src, dst = str(old.get(field) or "").strip(), str(new.get(field) or "").strip()
+        if not src or src.lower() == dst.lower():
+            continue
+        if len(src) < 3 or src.lower() in text.lower():
+            return True
+    return False
+
+
+class SemanticCache:
+    def __init__(self, path: str | pathlib.Path = DEFAULT_PATH, threshold: float = 0.95,
+                 max_entries: int = 50_000, ttl: float = 30 * 86400):
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.threshold, self.max_entries, self.ttl = threshold, max_entries, ttl
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY, scope TEXT, "
+                         "exact TEXT, fields TEXT, vec TEXT, text TEXT, created REAL, used REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_scope ON entries (scope, exact)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+        # (scope, exact) -> [(id, vec)], loaded on first use
+        self._index: dict[tuple[str, str], list[tuple[int, dict[int, float]]]] = {}
+
+    @staticmethod
+    def scope(code: str, template: str, model: str) -> str:
+        return hashlib.sha256(f"{VERSION}\0{code}\0{template}\0{model}".encode()).hexdigest()
+
+    @staticmethod
+    def _split(fields: dict) -> tuple[str, dict]:
+        exact = json.dumps({f: fields[f] for f in EXACT_FIELDS if f in fields}, sort_keys=True, default=str)
+        embedded = {f: v for f, v in fields.items()
+                    if f not in EXACT_FIELDS and (f not in ENTITY_FIELDS or f in EMBED_ENTITIES)}
+        return exact, embedded
+
+    def _entries(self, scope: str, exact: str) -> list[tuple[int, dict[int, float]]]:
+        if (scope, exact) not in self._index:
+            rows = self._db.execute("SELECT id, vec FROM entries WHERE scope = ? AND exact = ?",
+                                    (scope, exact)).fetchall()
+            self._index[(scope, exact)] = [(i, {int(k): v for k, v in json.loads(vec).items()})
+                                           for i, vec in rows]
+        return self._index[(scope, exact)]
+
+    def get(self, scope: str, fields: dict) -> tuple[str, float] | None:
+        # fields: the payload fields the prompt references -> (text, similarity)
+        exact, embedded = self._split(fields)
+        vec = embed(embedded)
+        now = time.time()
+        with self._lock:
+            best, best_id = 0.0, None
+            for i, other in self._entries(scope, exact):
+                s = similarity(vec, other)
+                if s > best:
+                    best, best_id = s, i
+            row = None
+            if best_id is not None and best >= self.threshold:
+                row = self._db.execute("SELECT fields, text, created FROM entries WHERE id = ?",
+                                       (best_id,)).fetchone()
+                if row and now - row[2] > self.ttl:
+                    self._forget(best_id)
+                    row = None
+            text = None
+            if row is not None:
+                old = json.loads(row[0])
+                text = substitute(row[1], old, fields)
+                if leaks(text, old, fields):
+                    text = None
+            if text is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET used = ? WHERE id = ?", (now, best_id))
+            self.hits += 1
+        return text, best
+
+    def put(self, scope: str, fields: dict, text: str):
+        exact, embedded = self._split(fields)
+        vec = embed(embedded)
+        now = time.time()
+        with self._lock:
+            entry_id = self._db.execute(
+                "INSERT INTO entries (scope, exact, fields, vec, text, created, used) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (scope, exact, json.dumps(fields, default=str), json.dumps(vec), text, now, now)).lastrowid
+            self._entries(scope, exact).append((entry_id, vec))
+            self._evict(now)
+
+    def _forget(self, entry_id: int):
+        self._db.execute("DELETE FROM entries WHERE id = ?", (entry_id,))
+        for entries in self._index.values():
+            entries[:] = [e for e in entries if e[0] != entry_id]
+
+    def _evict(self, now: float):
+        stale = [i for (i,) in self._db.execute("SELECT id FROM entries WHERE created < ?", (now - self.ttl,))]
+        count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - len(stale)
+        if count > self.max_entries:
+            stale += [i for (i,) in self._db.execute(
+                "SELECT id FROM entries WHERE created >= ? ORDER BY used LIMIT ?",
+                (now - self.ttl, count - self.max_entries))]
+        if stale:
+            self._db.executemany("DELETE FROM entries WHERE id = ?", [(i,) for i in stale])
+            gone = set(stale)
+            for entries in self._index.values():
+                entries[:] = [e for e in entries if e[0] not in gone]
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": entries,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None}
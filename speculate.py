@@ -0,0 +1,64 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, Future
+import engine
+import rules
+
+##############################################################################
+# SPECULATIVE PRE-GENERATION  (opt-in: AIACTPACK_SPECULATE=1)
+# While the wizard is being filled in, blocks that nearly every pack contains
+# start as soon as every field their prompt references has a value.  A change
+# to one of those fields replaces the call (a call already in flight runs to
+# completion and is ignored).  At submit, calls whose prompt still matches the
+# final payload are handed to the job instead of being repeated.  Prompts
+# already submitted are not speculated again (the rerun right after submit
+# still shows the same answers).
+##############################################################################
+# AIACTPACK_SPECULATE_CODES="" keeps the form-less wizard without speculating
+SPECULATIVE_CODES = tuple(c for c in os.getenv("AIACTPACK_SPECULATE_CODES", "A00,A01").split(",") if c)
+_pool = ThreadPoolExecutor(max_workers=int(os.getenv("AIACTPACK_SPECULATE_WORKERS", "4")),
+                           thread_name_prefix="aiactpack-spec")
+
+
+class Speculation:
+    # one per browser session
+    def __init__(self, codes: tuple[str, ...] = SPECULATIVE_CODES):
+        self.codes = codes
+        self._running: dict[str, tuple[str, Future]] = {}     # code -> (prompt, future)
+        self._submitted: dict[str, str] = {}                   # code -> prompt of the last submit
+
+    def update(self, fields: dict) -> list[str]:
+        # -> codes (re)started by this call
+        started = []
+        for code in self.codes:
+            if rules.fast_path(code):
+                continue                # rendered at submit in microseconds anyway
+            needed = engine.prompts.variables(code)
+            if "ctx" in needed or any(fields.get(v) in (None, "", []) for v in needed):
+                self._drop(code)
+                continue
+            prompt = engine.render_prompt(code, fields)
+            current = self._running.get(code)
+            if current and current[0] == prompt or self._submitted.get(code) == prompt:
+                continue
+            self._drop(code)
+            self._running[code] = (prompt, _pool.submit(engine.generate_block, code, dict(fields)))
+            started.append(code)
+        return started
+
+    def _drop(self, code: str):
+        current = self._running.pop(code, None)
+        if current:
+            current[1].cancel()
+
+    def take(self, payload: dict, codes: list[str]) -> dict[str, Future]:
+        # futures still valid for the submitted payload; everything else is dropped
+        self._submitted = {code: engine.render_prompt(code, payload) for code in self.codes
+                           if not rules.fast_path(code) and "ctx" not in engine.prompts.variables(code)}
+        out = {}
+        for code in codes:
+            current = self._running.get(code)
+            if current and not current[1].cancelled() and current[0] == engine.render_prompt(code, payload):
+                out[code] = self._running.pop(code)[1]
+        for code in list(self._running):
+            self._drop(code)
+        return out
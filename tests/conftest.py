@@ -0,0 +1,9 @@
+import os, sys
+
+# engine reads its configuration at import: offline stub backend, no shared caches
+os.environ.setdefault("OPENAI_KEY", "test")
+os.environ["AIACTPACK_BACKEND"] = "stub"
+os.environ["AIACTPACK_CACHE_DB"] = ""
+os.environ.pop("AIACTPACK_SEMANTIC_DB", None)
+os.environ.pop("AIACTPACK_GROUP_SIZE", None)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,64 @@
+import time
+import pytest
+from backends import LLMBackend, StubBackend, hedged
+
+
+class Scripted(LLMBackend):
+    # streams `pieces` with `delay` before each one, then raises `error` if set
+    def __init__(self, name: str, pieces: list[str], delay: float = 0.0, error: Exception | None = None):
+        super().__init__()
+        self.name, self.pieces, self.delay, self.error = name, pieces, delay, error
+        self.calls = 0
+
+    def _complete(self, prompt, max_tokens, on_chunk, on_headers):
+        self.calls += 1
+        for piece in self.pieces:
+            time.sleep(self.delay)
+            if on_chunk and piece:
+                on_chunk(piece)
+        if self.error:
+            raise self.error
+        return "".join(self.pieces), "stop", None
+
+
+def _warm(backend: LLMBackend, seconds: float = 0.01):
+    for _ in range(30):
+        backend.observe(seconds, stream=True)
+        backend.observe(seconds)
+
+
+def test_stream_failing_after_first_chunk_is_not_taken_over():
+    primary = Scripted("primary", ["PRIMARY-PARTIAL "], delay=0.05, error=RuntimeError("dropped"))
+    secondary = Scripted("secondary", ["SECONDARY-FULL"], delay=0.2)
+    _warm(primary)
+    chunks = []
+    with pytest.raises(RuntimeError):
+        hedged(primary, secondary, "p", 10, on_chunk=chunks.append)
+    time.sleep(0.3)
+    assert chunks == ["PRIMARY-PARTIAL "]
+
+
+def test_failure_before_answering_lets_the_secondary_win():
+    # one slow empty step: fails before its first chunk
+    primary = Scripted("primary", [""], delay=0.05, error=RuntimeError("down"))
+    secondary = Scripted("secondary", ["SECONDARY-FULL"])
+    _warm(primary)
+    chunks, stats = [], {}
+    assert hedged(primary, secondary, "p", 10, on_chunk=chunks.append, stats=stats)[0] == "SECONDARY-FULL"
+    assert chunks == ["SECONDARY-FULL"] and stats["backend"] == "secondary"
+
+
+def test_no_duplicate_when_primary_answers_during_on_hedge():
+    primary = Scripted("primary", ["ok"], delay=0.05)
+    secondary = Scripted("secondary", ["dup"])
+    _warm(primary)
+    skipped = []
+    out = hedged(primary, secondary, "p", 10, on_hedge=lambda: time.sleep(0.2),
+                 on_hedge_skipped=lambda: skipped.append(True))
+    assert out[0] == "ok" and skipped == [True] and secondary.calls == 0
+
+
+def test_stub_answers_multi_block_prompts_in_sections():
+    text, finish_reason, _ = StubBackend(words=3).complete("pre\n--- TASK A03 ---\nx\n--- TASK A04 ---\ny", 100)
+    assert finish_reason == "stop"
+    assert text.count("=== BEGIN") == 2 and text.count("=== END") == 2
@@ -0,0 +1,32 @@
+import pytest
+import batch
+import engine
+
+PAYLOAD = {"sector": "FinTech", "model_name": "CreditGPT", "n_users": 5000, "high_risk": "Credit scoring",
+           "data_modal": ["Tabular"], "deploy_env": "AWS", "ce_mark": "No", "target_mkt": ["EU"],
+           "sandbox": "No", "model_family": "GPT-4", "data_sources": "crm.csv"}
+
+
+class StuckBackend(batch.LocalBatchBackend):
+    # never finishes until cancelled
+    def status(self, batch_id: str) -> str:
+        return "cancelled" if (self.root / batch_id / "cancelled").exists() else "in_progress"
+
+
+def test_timed_out_batch_is_cancelled_and_falls_back(tmp_path):
+    backend = StuckBackend(tmp_path)
+    out = batch.run_batch(["A00", "A03", "B02"], PAYLOAD, backend, poll_interval=0.01, timeout=0.05)
+    assert all(finish_reason == "stop" for _, finish_reason in out.values())
+    (batch_dir,) = [p for p in tmp_path.iterdir() if p.is_dir()]
+    assert (batch_dir / "cancelled").exists()
+
+
+def test_rate_limited_blocks_are_not_packed(tmp_path, monkeypatch):
+    def limited(code, payload, **kwargs):
+        return {"code": code, "text": f"{engine.RATE_LIMIT_MSG} {code}", "finish_reason": "rate_limit"}
+    monkeypatch.setattr(engine, "generate_block", limited)
+    with pytest.raises(batch.RateLimitedBlocks) as err:
+        batch.build_pack_batch(["A00", "A03"], PAYLOAD, StuckBackend(tmp_path / "b"), tmp_path / "pack.zip",
+                               poll_interval=0.01, timeout=0.02)
+    assert err.value.codes == ["A00", "A03"]
+    assert not (tmp_path / "pack.zip").exists()
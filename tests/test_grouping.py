@@ -0,0 +1,72 @@
+import pytest
+import engine
+import rules
+from cache import BlockCache
+
+PAYLOAD = {"sector": "FinTech", "model_name": "CreditGPT", "n_users": 5000, "high_risk": "Credit scoring",
+           "data_modal": ["Tabular"], "deploy_env": "AWS", "ce_mark": "No", "target_mkt": ["EU"],
+           "sandbox": "No", "model_family": "GPT-4", "data_sources": "crm.csv"}
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    # engine.complete scripted per request: group requests answer with `grouped`
+    state = {"grouped": "", "requests": []}
+
+    def complete(code, prompt, on_chunk=None, stats=None, max_tokens=None):
+        state["requests"].append(code)
+        return (state["grouped"], "stop") if "+" in code else (f"single {code}", "stop")
+    monkeypatch.setattr(engine, "complete", complete)
+    return state
+
+
+def _texts(outs: list[dict]) -> dict[str, str]:
+    return {out["code"]: out["text"] for out in outs}
+
+
+def test_split_sections():
+    text = "=== BEGIN A03 ===\nfirst\n=== END A03 ===\nnoise\n=== BEGIN A04 ===\nsecond\n=== END A04 ==="
+    assert engine.split_sections(text) == {"A03": "first", "A04": "second"}
+    # unterminated and mismatched markers are not sections
+    assert engine.split_sections("=== BEGIN A03 ===\ncut off") == {}
+    assert engine.split_sections("=== BEGIN A03 ===\nx\n=== END A04 ===") == {}
+
+
+def test_group_prompt_sends_the_shared_preamble_once():
+    prompts = {"B02": "You are an auditor.\nSystem: X.\n\nMap the risks.",
+               "B03": "You are an auditor.\nSystem: X.\n\nMeasure the risks."}
+    text = engine.group_prompt(prompts)
+    assert text.count("You are an auditor.") == 1
+    assert "--- TASK B02 ---\nMap the risks." in text and "--- TASK B03 ---\nMeasure the risks." in text
+
+
+def test_missing_and_unterminated_sections_fall_back(llm):
+    llm["grouped"] = "=== BEGIN B02 ===\ngrouped B02\n=== END B02 ===\n=== BEGIN B04 ===\ncut"
+    outs = engine.generate_group(["B02", "B03", "B04"], PAYLOAD)
+    assert _texts(outs) == {"B02": "grouped B02", "B03": "single B03", "B04": "single B04"}
+    assert llm["requests"] == ["B02+B03+B04", "B03", "B04"]
+
+
+def test_fast_path_code_in_a_group_is_rendered_locally(llm):
+    llm["grouped"] = "=== BEGIN A00 ===\nA\n=== END A00 ===\n=== BEGIN A03 ===\nB\n=== END A03 ==="
+    outs = engine.generate_group(["A00", "A01", "A03"], PAYLOAD)
+    assert llm["requests"] == ["A00+A03"]
+    assert _texts(outs)["A01"] == rules.render("A01", PAYLOAD)
+    assert [out["code"] for out in outs] == ["A00", "A01", "A03"]
+
+
+def test_cached_codes_are_not_asked_for(llm, monkeypatch, tmp_path):
+    monkeypatch.setattr(engine, "block_cache", BlockCache(tmp_path / "cache.sqlite"))
+    engine.block_cache.put(engine.block_key("B02", engine.render_prompt("B02", PAYLOAD)), "B02", "cached B02")
+    llm["grouped"] = "=== BEGIN B03 ===\nx\n=== END B03 ===\n=== BEGIN B04 ===\ny\n=== END B04 ==="
+    outs = engine.generate_group(["B02", "B03", "B04"], PAYLOAD)
+    assert llm["requests"] == ["B03+B04"]
+    assert _texts(outs) == {"B02": "cached B02", "B03": "x", "B04": "y"}
+    assert outs[0]["metrics"]["cached"]
+    # parsed sections are cached under their own block key
+    assert engine.block_cache.get(engine.block_key("B03", engine.render_prompt("B03", PAYLOAD))) == "x"
+
+
+def test_group_codes_keeps_families_and_models_apart(monkeypatch):
+    monkeypatch.setattr(engine, "BLOCK_MODELS", {"A05": "gpt-4o"})
+    assert engine.group_codes(["A03", "A04", "A05", "A06", "B01"], 3) == [["A03", "A04"], ["A05"], ["A06"], ["B01"]]
@@ -0,0 +1,144 @@
+import os, json, time, socket, sqlite3
+import pytest
+import engine
+import jobs
+
+PAYLOAD = {"sector": "FinTech", "model_name": "CreditGPT", "n_users": 5000, "high_risk": "Credit scoring",
+           "data_modal": ["Tabular"], "deploy_env": "AWS", "ce_mark": "No", "target_mkt": ["EU"],
+           "sandbox": "No", "model_family": "GPT-4", "data_sources": "crm.csv"}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    # codes passed to engine.generate_block, in call order
+    seen = []
+    generate = engine.generate_block
+
+    def counting(code, payload, **kwargs):
+        seen.append(code)
+        return generate(code, payload, **kwargs)
+    monkeypatch.setattr(engine, "generate_block", counting)
+    return seen
+
+
+def _wait(queue: jobs.JobQueue, job_id: str, timeout: float = 10) -> dict:
+    deadline = time.time() + timeout
+    while queue.job(job_id)["status"] == "running" and time.time() < deadline:
+        time.sleep(0.01)
+    return queue.job(job_id)
+
+
+def _crashed_job(db, blocks: dict[str, tuple[str, str | None]]) -> str:
+    # a job left behind by a dead process: {code: (status, owner)}
+    jobs.JobQueue(db, resume=False)
+    job_id, now = "crashed", time.time()
+    con = sqlite3.connect(db, isolation_level=None)
+    con.execute("INSERT INTO jobs VALUES (?, ?, ?, '{}', 'running', NULL, ?, ?)",
+                (job_id, json.dumps(list(blocks)), json.dumps(PAYLOAD), now, now))
+    for i, (code, (status, owner)) in enumerate(blocks.items()):
+        con.execute("INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, code, i, status, owner, "old text" if status == "done" else None,
+                     "stop" if status == "done" else None, now))
+    con.close()
+    return job_id
+
+
+def _dead_owner() -> str:
+    pid = 2 ** 22 + 1
+    while True:
+        try:
+            os.kill(pid, 0)
+            pid += 1
+        except ProcessLookupError:
+            return f"{socket.gethostname()}:{pid}"
+        except PermissionError:
+            pid += 1
+
+
+def test_resume_reruns_only_unfinished_blocks(tmp_path, calls):
+    db = tmp_path / "jobs.sqlite"
+    job_id = _crashed_job(db, {"A00": ("done", None), "A03": ("running", _dead_owner()),
+                               "A04": ("pending", None), "A05": ("running", jobs.OWNER)})
+    queue = jobs.JobQueue(db)
+    assert _wait(queue, job_id)["status"] == "completed"
+    assert sorted(calls) == ["A03", "A04", "A05"]
+    assert queue.results(job_id)[0]["text"] == "old text"
+
+
+def test_block_of_a_live_owner_is_not_taken_over(tmp_path, calls):
+    db = tmp_path / "jobs.sqlite"
+    live = f"{socket.gethostname()}:{os.getppid()}"
+    job_id = _crashed_job(db, {"A00": ("done", None), "A03": ("running", live)})
+    queue = jobs.JobQueue(db)
+    time.sleep(0.1)
+    assert calls == [] and queue.status(job_id)["blocks"]["A03"] == "running"
+    assert queue.job(job_id)["status"] == "running"
+
+
+def _rate_limited(monkeypatch, failures: dict[str, int]):
+    # the first failures[code] calls of a code come back rate-limited
+    generate = engine.generate_block
+
+    def limited(code, payload, **kwargs):
+        if failures.get(code, 0) > 0:
+            failures[code] -= 1
+            return {"code": code, "text": f"{engine.RATE_LIMIT_MSG} {code}", "finish_reason": "rate_limit",
+                    "truncated": False, "summary": {}, "metrics": {}}
+        return generate(code, payload, **kwargs)
+    monkeypatch.setattr(engine, "generate_block", limited)
+    monkeypatch.setattr(engine, "RATE_LIMIT_PAUSE", 0.01)
+
+
+def test_rate_limited_block_is_requeued_until_it_succeeds(tmp_path, monkeypatch):
+    _rate_limited(monkeypatch, {"A03": 2})
+    queue = jobs.JobQueue(tmp_path / "jobs.sqlite")
+    job_id = queue.submit(["A00", "A03"], PAYLOAD)
+    assert _wait(queue, job_id)["status"] == "completed"
+    a03 = queue.results(job_id)[1]
+    assert a03["finish_reason"] == "stop" and engine.RATE_LIMIT_MSG not in a03["text"]
+
+
+def test_rate_limited_block_fails_after_the_last_attempt(tmp_path, monkeypatch):
+    failures = {"A03": 100}
+    _rate_limited(monkeypatch, failures)
+    queue = jobs.JobQueue(tmp_path / "jobs.sqlite")
+    job_id = queue.submit(["A00", "A03"], PAYLOAD)
+    assert _wait(queue, job_id)["status"] == "failed"
+    a03 = queue.results(job_id)[1]
+    assert a03["status"] == "failed" and engine.RATE_LIMIT_MSG not in a03["text"]
+    assert 100 - failures["A03"] == jobs.RATE_LIMIT_ATTEMPTS
+
+
+def test_regenerate_reruns_only_affected_blocks(tmp_path, calls):
+    queue = jobs.JobQueue(tmp_path / "jobs.sqlite")
+    job_id = queue.submit(["A00", "A03", "A06"], PAYLOAD)
+    assert _wait(queue, job_id)["status"] == "completed"
+    calls.clear()
+    new_id, pending = queue.regenerate(job_id, dict(PAYLOAD, deploy_env="GCP"))
+    assert _wait(queue, new_id)["status"] == "completed"
+    assert pending == calls == ["A06"]
+    assert queue.job(new_id)["meta"] == {"parent": job_id, "version": 2}
+    old, new = queue.results(job_id), queue.results(new_id)
+    assert [o["text"] for o in old[:2]] == [n["text"] for n in new[:2]]
+
+
+def test_regenerate_reruns_truncated_blocks(tmp_path, calls):
+    queue = jobs.JobQueue(tmp_path / "jobs.sqlite")
+    job_id = queue.submit(["A00", "A03", "A06"], PAYLOAD)
+    assert _wait(queue, job_id)["status"] == "completed"
+    queue._sql("UPDATE blocks SET finish_reason = 'length' WHERE job_id = ? AND code = 'A03'", (job_id,))
+    calls.clear()
+    new_id, pending = queue.regenerate(job_id, dict(PAYLOAD, deploy_env="GCP"))
+    assert _wait(queue, new_id)["status"] == "completed"
+    assert pending == ["A03", "A06"] and sorted(calls) == ["A03", "A06"]
+    assert not queue.results(new_id)[1]["truncated"]
+
+
+def test_affected_codes():
+    codes = ["A00", "A01", "A03", "A04", "A06", "B02"]
+    new = dict(PAYLOAD, n_users=9000)
+    # A04 uses n_users; A01 is rendered locally and always re-rendered
+    assert engine.affected_codes(codes, PAYLOAD, new) == ["A01", "A04"]
+    assert engine.affected_codes(codes, PAYLOAD, dict(PAYLOAD)) == []
+    assert "B02" in engine.affected_codes(codes, PAYLOAD, dict(PAYLOAD, model_name="Other"))
+    assert engine.changed_fields(PAYLOAD, dict(PAYLOAD, target_mkt=["EU", "UK"])) == {"target_mkt"}
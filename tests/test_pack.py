@@ -0,0 +1,15 @@
+import os, time, tempfile
+import pack
+
+
+def test_gc_only_removes_engine_block_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    store = pack.PackStore(tmp_path / "aiactpack_packs", ttl=60)
+    old = time.time() - 3600
+    dirs = {name: tmp_path / name for name in ("aiactpack_block_A00_x", "aiactpack_blocks_y",
+                                               "aiactpack_batch_z", "aiactpack_loadtest_w")}
+    for d in dirs.values():
+        d.mkdir()
+        os.utime(d, (old, old))
+    store.gc()
+    assert sorted(name for name, d in dirs.items() if d.exists()) == ["aiactpack_batch_z", "aiactpack_loadtest_w"]
@@ -0,0 +1,44 @@
+from semantic import SemanticCache
+
+
+def _cache(tmp_path) -> SemanticCache:
+    return SemanticCache(tmp_path / "semantic.sqlite")
+
+
+def test_model_name_only_prompt_hits(tmp_path):
+    # 38 of the 48 prompts reference only model_name: nothing is embedded
+    cache = _cache(tmp_path)
+    cache.put("B02", {"model_name": "Foo"}, "Foo maps its AI risks.")
+    assert cache.get("B02", {"model_name": "BarModel"}) == ("BarModel maps its AI risks.", 1.0)
+
+
+def test_exact_fields_must_match(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("A03", {"data_sources": "crm.csv"}, "Trained on crm.csv.")
+    assert cache.get("A03", {"data_sources": "crm.csv"})[0] == "Trained on crm.csv."
+    assert cache.get("A03", {"data_sources": "erp.csv"}) is None
+
+
+def test_user_counts_are_banded_and_substituted(tmp_path):
+    cache = _cache(tmp_path)
+    fields = {"model_name": "Foo", "sector": "FinTech", "n_users": 5000}
+    cache.put("A04", fields, "Foo serves 5,000 users.")
+    hit = cache.get("A04", dict(fields, model_name="Bar", n_users=8000))
+    assert hit[0] == "Bar serves 8,000 users."
+    assert cache.get("A04", dict(fields, n_users=80_000)) is None
+
+
+def test_short_model_name_is_a_miss(tmp_path):
+    # "Q7" is too short to replace safely, so the earlier answer is not reused
+    cache = _cache(tmp_path)
+    cache.put("B02", {"model_name": "Q7"}, "Q7 maps its AI risks.")
+    assert cache.get("B02", {"model_name": "OtherCo Scorer"}) is None
+
+
+def test_other_spellings_are_replaced_or_missed(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("B02", {"model_name": "CreditGPT"}, "CREDITGPT and creditgpt-based pipelines.")
+    assert cache.get("B02", {"model_name": "Zed"})[0] == "Zed and Zed-based pipelines."
+    # a spelling the word-boundary match cannot reach is served as a miss
+    cache.put("B03", {"model_name": "CreditGPT"}, "See CreditGPTv2 for details.")
+    assert cache.get("B03", {"model_name": "Zed"}) is None